@@ -0,0 +1,418 @@
+import heapq
+import math
+
+MIN_SHIPMENT = 5
+# Closest reachable suppliers offered to each deficit in the flow network
+FLOW_NEIGHBOURS = 16
+# Value of delivering one unit anywhere, on top of the receiver's weighted urgency;
+# larger than any road distance so the flow always moves as much as it can
+DELIVERY_VALUE = 100000.0
+# Weight of the receiver's urgency (0-1000) against road distance
+URGENCY_WEIGHT = 200.0
+# Costs are counted in whole steps of this many road units
+COST_STEP = 1.0
+# A cold solve first runs at COST_STEP * 2**k for k = COARSE_SCALES..1, each warm-starting the next
+COARSE_SCALES = 6
+EPS = 1e-9
+
+class GreedyAllocator:
+    """Serve deficits in urgency order, each from its nearest suppliers first"""
+    name = 'greedy'
+
+    def fork(self):
+        return self
+
+    def allocate(self, resource, suppliers, deficits, order, distance):
+        """Return (supplier index, deficit index, amount) shipments for one resource.
+
+        suppliers maps village index to surplus, deficits maps village index to
+        (amount, key), and order lists the deficit keys (-urgency, index) sorted.
+        """
+        shipments = []
+        remaining = dict(suppliers)
+        for _, deficit_index in order:
+            needed = deficits[deficit_index][0]
+
+            candidates = []
+            for supplier_index, surplus_amount in remaining.items():
+                if surplus_amount > 0:
+                    d = distance(supplier_index, deficit_index)
+                    if not math.isinf(d):
+                        candidates.append((d, supplier_index))
+            candidates.sort()
+
+            for _, supplier_index in candidates:
+                if needed <= 0:
+                    break
+
+                send_amount = min(needed, remaining[supplier_index])
+
+                if send_amount > MIN_SHIPMENT:
+                    shipments.append((supplier_index, deficit_index, send_amount))
+                    remaining[supplier_index] -= send_amount
+                    needed -= send_amount
+        return shipments
+
+class _FlowGraph:
+    """Residual graph for min-cost flow, edges stored in parallel lists"""
+    def __init__(self, num_nodes):
+        self.adjacent = [[] for _ in range(num_nodes)]
+        self.to = []
+        self.cap = []
+        self.cost = []
+
+    def add_edge(self, u, v, cap, cost):
+        """Add u->v and its zero-capacity reverse; returns the forward edge id (reverse is id ^ 1)"""
+        edge = len(self.to)
+        self.adjacent[u].append(edge)
+        self.to.append(v)
+        self.cap.append(cap)
+        self.cost.append(cost)
+        self.adjacent[v].append(edge + 1)
+        self.to.append(u)
+        self.cap.append(0.0)
+        self.cost.append(-cost)
+        return edge
+
+    def push(self, edge, amount):
+        self.cap[edge] -= amount
+        self.cap[edge ^ 1] += amount
+
+class MinCostFlowAllocator:
+    """Solve each resource's transfers as a min-cost flow by successive shortest paths.
+
+    Suppliers and deficits form a bipartite network between a source and a
+    sink, closed by a free sink-to-source arc. Roads cost their length;
+    reaching the sink through a deficit earns DELIVERY_VALUE plus the
+    weighted urgency, so the solution ships as much as it can, favouring
+    urgent receivers and short roads. Costs are whole COST_STEP units, which
+    keeps reduced costs exact. Each deficit is offered its FLOW_NEIGHBOURS
+    closest suppliers, plus any arc that carried flow last month. Flows of
+    MIN_SHIPMENT or less are folded into larger ones to the same deficit
+    rather than dropped.
+
+    Warm start: last month's node potentials and the flow on arcs that are
+    still at zero reduced cost are kept, and only the resulting imbalances
+    are re-routed, a Dijkstra pricing step then a blocking flow at a time.
+    Without last month's solution, coarser cost steps are solved first and
+    each warm-starts the next with its potentials doubled.
+    """
+    name = 'mincost'
+
+    def __init__(self, neighbours=FLOW_NEIGHBOURS):
+        self.neighbours = neighbours
+        self.previous = {}
+        self.phases = 0
+        self.augmentations = 0
+
+    def fork(self):
+        clone = MinCostFlowAllocator(self.neighbours)
+        clone.previous = {res: (dict(flows), dict(potential))
+                          for res, (flows, potential) in self.previous.items()}
+        return clone
+
+    def allocate(self, resource, suppliers, deficits, order, distance):
+        supplier_ids = [i for i in sorted(suppliers) if suppliers[i] > 0]
+        if not supplier_ids or not order:
+            self.previous.pop(resource, None)
+            return []
+
+        # Nodes: 0 source, 1 sink, then suppliers, then deficits in urgency order
+        node_keys = [('source',), ('sink',)]
+        node_keys.extend(('supplier', s) for s in supplier_ids)
+        node_keys.extend(('deficit', d) for _, d in order)
+        supplier_node = {s: 2 + k for k, s in enumerate(supplier_ids)}
+        deficit_node = {d: 2 + len(supplier_ids) + m for m, (_, d) in enumerate(order)}
+
+        flows, old_potential = self.previous.get(resource, ({}, {}))
+        offered = []
+        for _, d in order:
+            reachable = []
+            for s in supplier_ids:
+                road = distance(s, d)
+                if not math.isinf(road):
+                    reachable.append((road, s))
+            reachable.sort()
+            offered.extend((road, s, d) for road, s in reachable[:self.neighbours])
+            offered.extend((road, s, d) for road, s in reachable[self.neighbours:] if (s, d) in flows)
+
+        steps = [COST_STEP]
+        if not old_potential:
+            steps = [COST_STEP * 2 ** k for k in range(COARSE_SCALES, -1, -1)]
+        for k, step in enumerate(steps):
+            if k:
+                old_potential = {key: 2 * p for key, p in old_potential.items()}
+            graph = _FlowGraph(len(node_keys))
+            return_edge = graph.add_edge(1, 0, math.inf, 0.0)
+            source_edges = {s: graph.add_edge(0, supplier_node[s], suppliers[s], 0.0) for s in supplier_ids}
+            sink_edges = {}
+            for neg_urgency, d in order:
+                value = round((DELIVERY_VALUE - URGENCY_WEIGHT * neg_urgency) / step)
+                sink_edges[d] = graph.add_edge(deficit_node[d], 1, deficits[d][0], float(-value))
+            arcs = {}
+            for road, s, d in offered:
+                edge = graph.add_edge(supplier_node[s], deficit_node[d], math.inf, float(round(road / step)))
+                arcs[(s, d)] = (edge, road)
+
+            potential, excess = self._warm_start(graph, node_keys, arcs, flows, old_potential,
+                                                 return_edge, source_edges, sink_edges)
+            self._balance(graph, potential, excess)
+
+            flows = {}
+            for (s, d), (edge, _) in arcs.items():
+                amount = graph.cap[edge ^ 1]
+                if amount > EPS:
+                    flows[(s, d)] = amount
+            old_potential = dict(zip(node_keys, potential))
+        self.previous[resource] = (flows, old_potential)
+
+        planned = self._fold_dust(flows, suppliers, deficit_node)
+        shipments = [(deficit_node[d], arcs[(s, d)][1], s, d, amount) for (s, d), amount in planned.items()]
+        shipments.sort()
+        return [(s, d, amount) for _, _, s, d, amount in shipments]
+
+    def _fold_dust(self, flows, suppliers, deficit_node):
+        """Flows above MIN_SHIPMENT, with each smaller flow's amount re-routed over the larger ones.
+
+        The amount reaches its deficit along a chain of larger flows, each handing
+        it on to the next, from a supplier with that much spare surplus; failing
+        that, it is taken from the least urgent receiver in reach that can spare it.
+        """
+        planned = {}
+        dust = []
+        spare = dict(suppliers)
+        senders = {}
+        receivers = {}
+        for (s, d), amount in flows.items():
+            spare[s] -= amount
+            if amount > MIN_SHIPMENT:
+                planned[(s, d)] = amount
+                senders.setdefault(d, []).append(s)
+                receivers.setdefault(s, []).append(d)
+            else:
+                dust.append((deficit_node[d], s, d, amount))
+        dust.sort()
+
+        for _, s, d, amount in dust:
+            spare[s] += amount
+            # Breadth-first over deficits that would pass the amount on; via[r] is (supplier, next deficit)
+            via = {d: None}
+            frontier = [d]
+            found = None
+            cheapest = None
+            while frontier and found is None:
+                next_frontier = []
+                for receiver in frontier:
+                    for sender in senders.get(receiver, ()):
+                        if spare[sender] >= amount:
+                            found = (sender, receiver)
+                            break
+                        for other in receivers[sender]:
+                            if other in via or planned[(sender, other)] - amount <= MIN_SHIPMENT:
+                                continue
+                            via[other] = (sender, receiver)
+                            next_frontier.append(other)
+                            # Less urgent receivers sit later in deficit_node order
+                            if deficit_node[other] > deficit_node[d] and (
+                                    cheapest is None or deficit_node[other] > deficit_node[cheapest]):
+                                cheapest = other
+                    if found is not None:
+                        break
+                frontier = next_frontier
+            if found is not None:
+                sender, receiver = found
+                spare[sender] -= amount
+            elif cheapest is not None:
+                sender, receiver = via[cheapest]
+                planned[(sender, cheapest)] -= amount
+            else:
+                continue
+            planned[(sender, receiver)] += amount
+            while via[receiver] is not None:
+                taken_from = receiver
+                sender, receiver = via[receiver]
+                planned[(sender, taken_from)] -= amount
+                planned[(sender, receiver)] += amount
+        return planned
+
+    def _warm_start(self, graph, node_keys, arcs, flows, old_potential, return_edge, source_edges, sink_edges):
+        """Potentials and a pseudoflow meeting the optimality conditions; returns (potential, excess)"""
+        to = graph.to
+        cost = graph.cost
+        potential = [old_potential.get(key) for key in node_keys]
+        if potential[0] is None:
+            potential[0] = 0.0
+        if potential[1] is None or potential[1] < potential[0]:
+            potential[1] = potential[0]
+        for s, edge in source_edges.items():
+            v = to[edge]
+            if potential[v] is None:
+                potential[v] = potential[0]
+        # Roads have unlimited capacity, so their reduced costs must not be negative
+        for edge, _ in arcs.values():
+            u, v = to[edge ^ 1], to[edge]
+            bound = cost[edge] + potential[u]
+            if potential[v] is None or potential[v] > bound:
+                potential[v] = bound
+        for d, edge in sink_edges.items():
+            u = to[edge ^ 1]
+            if potential[u] is None:
+                potential[u] = potential[1]
+
+        def reduced(edge):
+            return cost[edge] + potential[to[edge ^ 1]] - potential[to[edge]]
+
+        outflow = {}
+        inflow = {}
+        for (s, d), (edge, _) in arcs.items():
+            amount = flows.get((s, d), 0.0)
+            if amount > EPS and reduced(edge) == 0:
+                graph.push(edge, amount)
+                outflow[s] = outflow.get(s, 0.0) + amount
+                inflow[d] = inflow.get(d, 0.0) + amount
+
+        def settle(edge, wanted):
+            rc = reduced(edge)
+            if rc < 0:
+                amount = graph.cap[edge]
+            elif rc > 0:
+                amount = 0.0
+            else:
+                amount = min(wanted, graph.cap[edge])
+            if amount > 0:
+                graph.push(edge, amount)
+            return amount
+
+        shipped = sum(settle(edge, outflow.get(s, 0.0)) for s, edge in source_edges.items())
+        received = sum(settle(edge, inflow.get(d, 0.0)) for d, edge in sink_edges.items())
+        if reduced(return_edge) == 0:
+            graph.push(return_edge, min(shipped, received))
+
+        excess = [0.0] * len(node_keys)
+        for edge in range(0, len(to), 2):
+            amount = graph.cap[edge + 1]
+            if amount > 0:
+                excess[to[edge + 1]] -= amount
+                excess[to[edge]] += amount
+        return potential, excess
+
+    def _balance(self, graph, potential, excess):
+        """Route every excess to a deficit: price by Dijkstra, then push a blocking flow at zero reduced cost"""
+        to = graph.to
+        cap = graph.cap
+        cost = graph.cost
+        adjacent = graph.adjacent
+        n = len(adjacent)
+
+        while True:
+            sources = [v for v in range(n) if excess[v] > EPS]
+            if not sources:
+                return
+
+            dist = [math.inf] * n
+            heap = []
+            for v in sources:
+                dist[v] = 0.0
+                heap.append((0.0, v))
+            reach = math.inf
+            while heap:
+                du, u = heapq.heappop(heap)
+                if du > dist[u]:
+                    continue
+                if excess[u] < -EPS:
+                    reach = du
+                    break
+                pu = potential[u]
+                for edge in adjacent[u]:
+                    if cap[edge] > EPS:
+                        v = to[edge]
+                        nd = du + cost[edge] + pu - potential[v]
+                        if nd < dist[v]:
+                            dist[v] = nd
+                            heapq.heappush(heap, (nd, v))
+            if math.isinf(reach):
+                return
+            # Capping at the nearest deficit's distance keeps all reduced costs non-negative
+            for v in range(n):
+                potential[v] += dist[v] if dist[v] < reach else reach
+            self.phases += 1
+
+            # Potentials hold for the whole phase, so its zero reduced cost edges are listed once
+            admissible = [[edge for edge in adjacent[u] if cost[edge] + potential[u] == potential[to[edge]]]
+                          for u in range(n)]
+            while self._blocking_flow(graph, admissible, excess):
+                pass
+
+    def _blocking_flow(self, graph, admissible, excess):
+        to = graph.to
+        cap = graph.cap
+        n = len(admissible)
+
+        # Levels over zero reduced cost edges keep the search off zero-cost cycles
+        level = [-1] * n
+        frontier = [v for v in range(n) if excess[v] > EPS]
+        for v in frontier:
+            level[v] = 0
+        found = False
+        while frontier and not found:
+            next_frontier = []
+            for u in frontier:
+                for edge in admissible[u]:
+                    v = to[edge]
+                    if level[v] < 0 and cap[edge] > EPS:
+                        level[v] = level[u] + 1
+                        next_frontier.append(v)
+                        if excess[v] < -EPS:
+                            found = True
+            frontier = next_frontier
+        if not found:
+            return False
+
+        cursor = [0] * n
+        pushed = False
+        for start in range(n):
+            while excess[start] > EPS and level[start] == 0:
+                path = []
+                u = start
+                while excess[u] >= -EPS or u == start:
+                    edges = admissible[u]
+                    while cursor[u] < len(edges):
+                        edge = edges[cursor[u]]
+                        v = to[edge]
+                        if level[v] == level[u] + 1 and cap[edge] > EPS:
+                            break
+                        cursor[u] += 1
+                    if cursor[u] < len(edges):
+                        edge = edges[cursor[u]]
+                        path.append(edge)
+                        u = to[edge]
+                    elif path:
+                        # Dead end: retreat and skip the edge that led here
+                        level[u] = -1
+                        u = to[path.pop() ^ 1]
+                        cursor[u] += 1
+                    else:
+                        break
+                if not path:
+                    level[start] = -1
+                    break
+
+                amount = min(excess[start], -excess[u], min(cap[edge] for edge in path))
+                for edge in path:
+                    graph.push(edge, amount)
+                excess[start] -= amount
+                excess[u] += amount
+                self.augmentations += 1
+                pushed = True
+        return pushed
+
+ALLOCATORS = {
+    GreedyAllocator.name: GreedyAllocator,
+    MinCostFlowAllocator.name: MinCostFlowAllocator,
+}
+
+def make_allocator(name):
+    try:
+        return ALLOCATORS[name]()
+    except KeyError:
+        raise ValueError(f"Unknown allocator {name!r}; choose from {', '.join(ALLOCATORS)}") from None
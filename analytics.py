@@ -0,0 +1,135 @@
+import constants as C
+import scenario as S
+from event_store import EVENT
+
+BUILD_EFFECT_MONTHS = 12
+
+class RunAnalytics:
+    """End-of-run report data, accumulated as the run progresses.
+
+    Every figure is updated in place from trade and month listeners, so the
+    end report reads finished aggregates instead of re-scanning history.
+    """
+    def __init__(self):
+        self.names = []
+        self.index = {}
+
+        # flows[resource][i][j]: amount delivered from city i to city j
+        self.flows = {}
+        self.sent = {}
+        self.delivered = {}
+
+        self.population_trend = []
+        self.deaths = []
+        self.destroyed_at = []
+        self.event_exposure = []
+        self.event_months = []
+
+        self.builds = []
+        self.pending_builds = []
+
+        self.month = 0
+        self._last_population = []
+        self._last_buildings = []
+        self._record_count = 0
+
+    def attach(self, engine):
+        self.names = [v.name for v in engine.villages]
+        self.index = {name: i for i, name in enumerate(self.names)}
+        n = len(self.names)
+
+        self.flows = {res: [[0.0] * n for _ in range(n)] for res in C.RESOURCES}
+        self.sent = {res: 0.0 for res in C.RESOURCES}
+        self.delivered = {res: 0.0 for res in C.RESOURCES}
+
+        self.deaths = [0] * n
+        self.destroyed_at = [None] * n
+        self.event_exposure = [{event_type: 0 for event_type in C.EVENT_TYPES} for _ in range(n)]
+        self.event_months = [0] * n
+
+        self._last_population = [v.population for v in engine.villages]
+        self._last_buildings = [len(v.buildings) for v in engine.villages]
+        self._record_count = len(engine.event_store)
+        self.population_trend.append(sum(self._last_population))
+
+        engine.trade_system.trade_listeners.append(self.record_trade)
+        engine.month_listeners.append(self.record_month)
+
+    def record_trade(self, from_village, to_village, resource, amount, delivered):
+        i = self.index[from_village.name]
+        j = self.index[to_village.name]
+        self.flows[resource][i][j] += delivered
+        self.sent[resource] += amount
+        self.delivered[resource] += delivered
+
+    def record_month(self, engine):
+        self.month += 1
+
+        total_population = 0
+        for i, village in enumerate(engine.villages):
+            if village.is_alive:
+                total_population += village.population
+            lost = self._last_population[i] - village.population
+            if lost > 0:
+                self.deaths[i] += lost
+            self._last_population[i] = village.population
+
+            if not village.is_alive and self.destroyed_at[i] is None:
+                self.destroyed_at[i] = engine.get_time_string()
+                # A destroyed city's remaining people are lost too
+                self.deaths[i] += village.population
+                self._last_population[i] = 0
+
+            if village.active_events:
+                self.event_months[i] += 1
+
+            if len(village.buildings) > self._last_buildings[i]:
+                for building_type in village.buildings[self._last_buildings[i]:]:
+                    self._record_build(engine, i, building_type)
+                self._last_buildings[i] = len(village.buildings)
+
+        self.population_trend.append(total_population)
+
+        store = engine.event_store
+        event_names = S.TABLES.event_names
+        for r in range(self._record_count, len(store)):
+            if store.kinds[r] == EVENT:
+                self.event_exposure[store.villages[r]][event_names[store.types[r]]] += 1
+        self._record_count = len(store)
+
+        still_pending = []
+        for build in self.pending_builds:
+            if self.month - build['month'] >= BUILD_EFFECT_MONTHS:
+                village = engine.villages[build['city']]
+                build['population_change'] = village.population - build['population']
+                build['score_change'] = engine.sustainability_score - build['score']
+            else:
+                still_pending.append(build)
+        self.pending_builds = still_pending
+
+    def _record_build(self, engine, i, building_type):
+        build = {
+            'city': i,
+            'building': building_type,
+            'time': engine.get_time_string(),
+            'month': self.month,
+            'population': engine.villages[i].population,
+            'score': engine.sustainability_score,
+            'population_change': None,
+            'score_change': None,
+        }
+        self.builds.append(build)
+        self.pending_builds.append(build)
+
+    def top_routes(self, resource=None, count=10):
+        """Largest (from, to, amount) flows for one resource, or all resources combined"""
+        resources = [resource] if resource else C.RESOURCES
+        n = len(self.names)
+        routes = []
+        for i in range(n):
+            for j in range(n):
+                amount = sum(self.flows[res][i][j] for res in resources)
+                if amount > 0:
+                    routes.append((self.names[i], self.names[j], amount))
+        routes.sort(key=lambda r: r[2], reverse=True)
+        return routes[:count]
@@ -0,0 +1,53 @@
+import queue
+import threading
+import pygame
+
+class AssetLoader:
+    """Loads images on a background thread; the main thread converts them once they arrive"""
+    def __init__(self):
+        self.requests = queue.Queue()
+        self.results = queue.Queue()
+        self.requested = set()
+        self.delivered = 0
+
+        self.thread = threading.Thread(target=self._worker, name='asset-loader', daemon=True)
+        self.thread.start()
+
+    def request(self, key, path, size=None):
+        """Queue an image for loading, optionally pre-scaled to size; repeat requests are ignored"""
+        if key in self.requested:
+            return
+        self.requested.add(key)
+        self.requests.put((key, path, size))
+
+    def _worker(self):
+        while True:
+            key, path, size = self.requests.get()
+            try:
+                img = pygame.image.load(path)
+                if size and img.get_size() != size:
+                    img = pygame.transform.smoothscale(img, size)
+            except (pygame.error, OSError, ValueError):
+                img = None
+            self.results.put((key, img))
+
+    def poll(self):
+        """Return (key, surface) pairs loaded since the last poll, converted to the display format.
+
+        A surface of None means the file could not be loaded.
+        """
+        loaded = []
+        while True:
+            try:
+                key, img = self.results.get_nowait()
+            except queue.Empty:
+                break
+            if img is not None:
+                img = img.convert_alpha()
+            loaded.append((key, img))
+        self.delivered += len(loaded)
+        return loaded
+
+    def pending(self):
+        """Requests not yet returned by poll()"""
+        return len(self.requested) - self.delivered
@@ -0,0 +1,156 @@
+import argparse
+import math
+import random
+import time
+import constants as C
+from allocators import ALLOCATORS, make_allocator
+from game_engine import GameEngine
+from headless import step_month, summarize
+
+def run_engine(name, seed):
+    """Full seeded run with one allocator: summary plus shipped volume, ton-distance and planning time"""
+    engine = GameEngine(seed=seed, allocator=make_allocator(name))
+    trade_system = engine.trade_system
+    totals = {'shipped': 0.0, 'ton_distance': 0.0, 'plan_time': 0.0}
+
+    def record(from_village, to_village, resource, amount, delivered):
+        totals['shipped'] += amount
+        totals['ton_distance'] += amount * trade_system.routes.distance(
+            trade_system.village_index[from_village.name], trade_system.village_index[to_village.name])
+    trade_system.trade_listeners.append(record)
+
+    plan = trade_system.calculate_trades
+    def timed_plan():
+        started = time.perf_counter()
+        trades = plan()
+        totals['plan_time'] += time.perf_counter() - started
+        return trades
+    trade_system.calculate_trades = timed_plan
+
+    while not engine.simulation_complete:
+        step_month(engine)
+    return summarize(engine), totals
+
+def synthetic_problem(size, rng):
+    """Random map of size villages: half suppliers, half deficits, Euclidean roads"""
+    positions = [(rng.uniform(0, 2000), rng.uniform(0, 2000)) for _ in range(size)]
+    suppliers = {}
+    deficits = {}
+    order = []
+    for i in range(size):
+        if rng.random() < 0.5:
+            suppliers[i] = rng.uniform(10, 400)
+        else:
+            urgency = rng.uniform(1, 1000)
+            key = (-urgency, i)
+            deficits[i] = (rng.uniform(10, 400), key)
+            order.append(key)
+    order.sort()
+
+    def distance(a, b):
+        return math.dist(positions[a], positions[b])
+    return suppliers, deficits, order, distance
+
+def tally(shipments, deficits, distance):
+    """Shipped volume, ton-distance and unmet urgency (shortfall times urgency) of one plan"""
+    shipped = ton_distance = unmet = 0.0
+    received = {}
+    for s, d, amount in shipments:
+        shipped += amount
+        ton_distance += amount * distance(s, d)
+        received[d] = received.get(d, 0.0) + amount
+    for d, (amount, key) in deficits.items():
+        unmet += max(0.0, amount - received.get(d, 0.0)) * -key[0]
+    return shipped, ton_distance, unmet
+
+def bench_same_states(seeds):
+    """Every allocator planning the same monthly states, taken from greedy runs"""
+    totals = {name: [0.0, 0.0, 0.0, 0.0] for name in ALLOCATORS}
+    solves = 0
+    for seed in range(seeds):
+        engine = GameEngine(seed=seed, allocator=make_allocator('greedy'))
+        allocators = {name: make_allocator(name) for name in ALLOCATORS}
+
+        def allocate(resource, suppliers, deficits, order, distance):
+            nonlocal solves
+            solves += 1
+            plans = {}
+            for name, allocator in allocators.items():
+                started = time.perf_counter()
+                plans[name] = allocator.allocate(resource, suppliers, deficits, order, distance)
+                row = totals[name]
+                row[0] += time.perf_counter() - started
+                for k, value in enumerate(tally(plans[name], deficits, distance), 1):
+                    row[k] += value
+            return plans['greedy']
+        engine.trade_system.allocator.allocate = allocate
+
+        while not engine.simulation_complete:
+            step_month(engine)
+
+    print(f"{'allocator':>10} {'ms/solve':>9} {'shipped':>10} {'avg dist':>9} {'unmet urgency':>14}")
+    for name in sorted(ALLOCATORS):
+        elapsed, shipped, ton_distance, unmet = totals[name]
+        print(f"{name:>10} {elapsed / solves * 1000:>9.2f} {shipped / seeds:>10.0f} "
+              f"{ton_distance / max(shipped, 1):>9.1f} {unmet / seeds / 1000:>14.0f}")
+
+def bench_synthetic(sizes, months, seed):
+    """Per size and allocator; month % is planning every resource once, as a share of SECONDS_PER_MONTH"""
+    rng = random.Random(seed)
+    print(f"{'villages':>8} {'allocator':>10} {'ms/solve':>9} {'month %':>8} {'shipped':>10} {'avg dist':>9} "
+          f"{'unmet urgency':>14}")
+    for size in sizes:
+        # Month to month, stocks drift a little so warm starts have something to reuse
+        base = synthetic_problem(size, rng)
+        problems = []
+        for _ in range(months):
+            suppliers = {i: amount * rng.uniform(0.9, 1.1) for i, amount in base[0].items()}
+            deficits = {i: (amount * rng.uniform(0.9, 1.1), key) for i, (amount, key) in base[1].items()}
+            problems.append((suppliers, deficits, base[2], base[3]))
+
+        for name in sorted(ALLOCATORS):
+            allocator = make_allocator(name)
+            elapsed = shipped = ton_distance = unmet = 0.0
+            for suppliers, deficits, order, distance in problems:
+                started = time.perf_counter()
+                shipments = allocator.allocate('wood', suppliers, deficits, order, distance)
+                elapsed += time.perf_counter() - started
+                plan_shipped, plan_distance, plan_unmet = tally(shipments, deficits, distance)
+                shipped += plan_shipped
+                ton_distance += plan_distance
+                unmet += plan_unmet
+            month_share = elapsed / months * len(C.RESOURCES) / C.SECONDS_PER_MONTH * 100
+            print(f"{size:>8} {name:>10} {elapsed / months * 1000:>9.2f} {month_share:>8.1f} {shipped / months:>10.0f} "
+                  f"{ton_distance / max(shipped, 1):>9.1f} {unmet / months / 1000:>14.0f}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare trade allocators in full runs and on synthetic maps")
+    parser.add_argument('--seeds', type=int, default=5, help="full simulation runs per allocator")
+    parser.add_argument('--sizes', default='50,100,200,400', help="synthetic map sizes")
+    parser.add_argument('--months', type=int, default=6, help="consecutive synthetic months per size")
+    args = parser.parse_args()
+
+    print(f"Full runs, seeds 0-{args.seeds - 1} (means)")
+    print(f"{'allocator':>10} {'alive':>6} {'score':>8} {'trades':>7} {'shipped':>9} {'avg dist':>9} {'plan s':>7}")
+    for name in sorted(ALLOCATORS):
+        rows = [run_engine(name, seed) for seed in range(args.seeds)]
+        n = len(rows)
+        alive = sum(summary['alive_cities'] for summary, _ in rows) / n
+        score = sum(summary['sustainability_score'] for summary, _ in rows) / n
+        trades = sum(summary['total_trades'] for summary, _ in rows) / n
+        shipped = sum(totals['shipped'] for _, totals in rows) / n
+        ton_distance = sum(totals['ton_distance'] for _, totals in rows) / n
+        plan_time = sum(totals['plan_time'] for _, totals in rows) / n
+        print(f"{name:>10} {alive:>6.1f} {score:>8.0f} {trades:>7.0f} {shipped:>9.0f} "
+              f"{ton_distance / max(shipped, 1):>9.1f} {plan_time:>7.3f}")
+
+    print()
+    print("Same monthly states from the greedy runs, planned by each allocator (per run; unmet urgency in thousands)")
+    bench_same_states(args.seeds)
+
+    print()
+    print(f"Synthetic maps, {args.months} months each (unmet urgency in thousands of urgency-units)")
+    bench_synthetic([int(size) for size in args.sizes.split(',')], args.months, seed=0)
+
+if __name__ == '__main__':
+    main()
@@ -59,6 +59,7 @@ EVENT_TYPES = {
         'name': 'Drought',
         'duration': 3,
         'effect': 'No livestock or grain production',
+        'blocks_production': ['livestock', 'grain'],
         'icon': '☀️',
         'color': (255, 200, 0)
     },
@@ -66,6 +67,7 @@ EVENT_TYPES = {
         'name': 'Pirate Raid',
         'duration': 1,
         'effect': 'Steals 50% of resources',
+        'steal_fraction': 0.5,
         'icon': '🏴‍☠️',
         'color': (100, 0, 0)
     },
@@ -73,6 +75,7 @@ EVENT_TYPES = {
         'name': 'Lightning Storm',
         'duration': 2,
         'effect': 'Blocks trade routes',
+        'blocks_trade': True,
         'icon': '⚡',
         'color': (200, 200, 255)
     },
@@ -80,6 +83,8 @@ EVENT_TYPES = {
         'name': 'Plague',
         'duration': 4,
         'effect': 'Cuts trade, kills 10% population/month',
+        'blocks_trade': True,
+        'death_rate': 0.10,
         'icon': '🦠',
         'color': (100, 255, 100)
     },
@@ -87,6 +92,7 @@ EVENT_TYPES = {
         'name': 'Labor Strike',
         'duration': 3,
         'effect': 'No wood or iron production',
+        'blocks_production': ['wood', 'iron'],
         'icon': '🔨',
         'color': (150, 150, 150)
     }
@@ -97,6 +103,7 @@ BUILDINGS = {
         'name': 'City Wall',
         'cost': {'iron': 150, 'wood': 80, 'gold': 300},
         'effect': 'Reduces plague effects by 30%',
+        'death_rate_multiplier': 0.70,
         'icon': '🏰',
         'color': (128, 128, 128)
     },
@@ -104,6 +111,7 @@ BUILDINGS = {
         'name': 'Refugee Camp',
         'cost': {'wood': 100, 'livestock': 75, 'grain': 75, 'gold': 200},
         'effect': 'Increases production by 5%',
+        'production_multiplier': 1.05,
         'icon': '⛺',
         'color': (139, 69, 19)
     },
@@ -118,6 +126,7 @@ BUILDINGS = {
         'name': 'Granary Complex',
         'cost': {'gold': 300, 'wood': 150, 'grain': 100},
         'effect': '50% grain production during drought',
+        'protects': {'grain': 0.5},
         'icon': '🌾',
         'color': (218, 165, 32)
     },
@@ -125,6 +134,7 @@ BUILDINGS = {
         'name': 'Royal Hotel',
         'cost': {'gold': 400, 'iron': 80},
         'effect': 'Increases gold production by 5%',
+        'gold_multiplier': 1.05,
         'icon': '🏨',
         'color': (255, 215, 0)
     }
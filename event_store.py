@@ -0,0 +1,183 @@
+import bisect
+from array import array
+from collections.abc import Sequence
+import constants as C
+import scenario as S
+
+# Record kinds: a disaster striking a village, or a building going up
+EVENT = 0
+BUILD = 1
+
+def to_month(year, month):
+    """Month index as the engine and replays count them (1 is January of the start year)"""
+    return (year - C.SIMULATION_START_YEAR) * 12 + month
+
+def _year_month(month_index):
+    return C.SIMULATION_START_YEAR + (month_index - 1) // 12, (month_index - 1) % 12 + 1
+
+class EventStore:
+    """Every disaster and construction in a run, as fixed-width records in typed arrays.
+
+    Record r is (months[r], kinds[r], types[r], villages[r]): a month index, EVENT
+    or BUILD, the event or building id from scenario.TABLES, and the village
+    index. Nothing is stored as text; names are looked up when a record is
+    shown. Records are appended in month order, so the per-village and
+    per-type lists of record numbers are sorted by month too and month ranges
+    are found by bisection. A disaster may strike several villages at once;
+    starts and sizes hold the first record and record count of each.
+    """
+    def __init__(self, names):
+        self.names = names
+        self.month = 0
+        self.months = array('H')
+        self.kinds = array('B')
+        self.types = array('B')
+        self.villages = array('H')
+        self.starts = array('I')
+        self.sizes = array('B')
+        self.by_village = [array('I') for _ in names]
+        self.by_type = {}
+        self.history = EventHistory(self)
+
+    def __len__(self):
+        return len(self.months)
+
+    def fork(self):
+        clone = EventStore.__new__(EventStore)
+        clone.names = self.names
+        clone.month = self.month
+        for field in ('months', 'kinds', 'types', 'villages', 'starts', 'sizes'):
+            setattr(clone, field, array(getattr(self, field).typecode, getattr(self, field)))
+        clone.by_village = [array('I', records) for records in self.by_village]
+        clone.by_type = {key: array('I', records) for key, records in self.by_type.items()}
+        clone.history = EventHistory(clone)
+        return clone
+
+    def _append(self, kind, type_id, village):
+        record = len(self.months)
+        self.months.append(self.month)
+        self.kinds.append(kind)
+        self.types.append(type_id)
+        self.villages.append(village)
+        self.by_village[village].append(record)
+        self.by_type.setdefault((kind, type_id), array('I')).append(record)
+        return record
+
+    def add_event(self, event_type, villages):
+        """Record one disaster striking the given village indices this month"""
+        type_id = S.TABLES.event_ids[event_type]
+        self.starts.append(len(self.months))
+        self.sizes.append(len(villages))
+        for village in villages:
+            self._append(EVENT, type_id, village)
+
+    def add_build(self, building_type, village):
+        self._append(BUILD, S.TABLES.building_names.index(building_type), village)
+
+    def tail(self, start):
+        """Records from start on, as compact arrays (what a mirror needs to catch up)"""
+        first = bisect.bisect_left(self.starts, start)
+        return (self.months[start:], self.kinds[start:], self.types[start:], self.villages[start:],
+                array('I', (s - start for s in self.starts[first:])), self.sizes[first:])
+
+    def extend(self, tail):
+        """Append records taken from another store's tail()"""
+        months, kinds, types, villages, starts, sizes = tail
+        offset = len(self.months)
+        self.starts.extend(s + offset for s in starts)
+        self.sizes.extend(sizes)
+        saved = self.month
+        for month, kind, type_id, village in zip(months, kinds, types, villages):
+            self.month = month
+            self._append(kind, type_id, village)
+        self.month = saved
+
+    def type_name(self, record):
+        if self.kinds[record] == EVENT:
+            return S.TABLES.event_names[self.types[record]]
+        return S.TABLES.building_names[self.types[record]]
+
+    def record(self, record):
+        """(month index, EVENT or BUILD, event or building type, village index)"""
+        return self.months[record], self.kinds[record], self.type_name(record), self.villages[record]
+
+    def describe(self, record):
+        """Log line for a record, e.g. 'Plague' or 'Built Granary'"""
+        if self.kinds[record] == EVENT:
+            return C.EVENT_TYPES[self.type_name(record)]['name']
+        return f"Built {C.BUILDINGS[self.type_name(record)]['name']}"
+
+    def select(self, village=None, event_type=None, building_type=None, first_month=None, last_month=None):
+        """Record numbers in month order, filtered by village index, type and an inclusive month range.
+
+        Plagues in the first village from 1455 to 1460:
+        store.select(0, 'plague', first_month=to_month(1455, 1), last_month=to_month(1460, 12))
+        """
+        if event_type is not None and building_type is not None:
+            return []
+        key = None
+        if event_type is not None:
+            key = (EVENT, S.TABLES.event_ids[event_type])
+        elif building_type is not None:
+            key = (BUILD, S.TABLES.building_names.index(building_type))
+
+        if village is not None:
+            records = self.by_village[village]
+        elif key is not None:
+            records = self.by_type.get(key, ())
+        else:
+            records = range(len(self.months))
+
+        months = self.months.__getitem__
+        lo = 0 if first_month is None else bisect.bisect_left(records, first_month, key=months)
+        hi = len(records) if last_month is None else bisect.bisect_right(records, last_month, key=months)
+        found = records[lo:hi]
+        if village is not None and key is not None:
+            kinds, types = self.kinds, self.types
+            return [r for r in found if (kinds[r], types[r]) == key]
+        return list(found)
+
+    def count(self, village=None, event_type=None, building_type=None, first_month=None, last_month=None):
+        return len(self.select(village, event_type, building_type, first_month, last_month))
+
+    def last(self, village, n):
+        """The village's n most recent record numbers, oldest first"""
+        return list(self.by_village[village][-n:]) if n > 0 else []
+
+    def log(self, village):
+        return VillageLog(self, village)
+
+class EventHistory(Sequence):
+    """Disasters as (year, month, event type, [village names]) tuples, built from the store on access"""
+    def __init__(self, store):
+        self.store = store
+
+    def __len__(self):
+        return len(self.store.starts)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        store = self.store
+        starts = store.starts
+        if index < 0:
+            index += len(starts)
+        start = starts[index]
+        end = start + store.sizes[index]
+        names = store.names
+        year, month = _year_month(store.months[start])
+        return (year, month, store.type_name(start), [names[store.villages[r]] for r in range(start, end)])
+
+class VillageLog(Sequence):
+    """One village's log lines, rendered from its records on access"""
+    def __init__(self, store, village):
+        self.store = store
+        self.records = store.by_village[village]
+
+    def __len__(self):
+        return len(self.records)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self.store.describe(r) for r in self.records[index]]
+        return self.store.describe(self.records[index])
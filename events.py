@@ -1,36 +1,42 @@
 
 import random
 import constants as C
+from event_store import EventStore, to_month
 
 class EventSystem:
     """Manages random disaster events"""
-    def __init__(self, villages):
+    def __init__(self, villages, rng=None, store=None):
         self.villages = villages
-        self.event_history = []
+        self.rng = rng or random.Random()
+        self.village_index = {v.name: i for i, v in enumerate(villages)}
+        self.store = store if store is not None else EventStore([v.name for v in villages])
+        # (year, month, event type, [village names]) per disaster, read from the store
+        self.event_history = self.store.history
     
     def check_and_spawn_events(self, year, month):
         """Check if events should spawn this month"""
+        self.store.month = to_month(year, month)
         # Random chance for event
-        if random.random() < C.EVENT_BASE_CHANCE:
+        if self.rng.random() < C.EVENT_BASE_CHANCE:
             self.spawn_random_event(year, month)
     
     def spawn_random_event(self, year, month):
         """Spawn a random disaster event"""
         # Choose random event type
-        event_type = random.choice(list(C.EVENT_TYPES.keys()))
+        event_type = self.rng.choice(list(C.EVENT_TYPES.keys()))
         
         alive_villages = [v for v in self.villages if v.is_alive and not v.is_capital]
         
         if not alive_villages:
             return
         
-        num_affected = random.randint(1, min(3, len(alive_villages)))
-        affected_villages = random.sample(alive_villages, num_affected)
+        num_affected = self.rng.randint(1, min(3, len(alive_villages)))
+        affected_villages = self.rng.sample(alive_villages, num_affected)
         
         for village in affected_villages:
             village.add_event(event_type)
         
         village_names = [v.name for v in affected_villages]
-        self.event_history.append((year, month, event_type, village_names))
+        self.store.add_event(event_type, [self.village_index[name] for name in village_names])
         
         return event_type, village_names
\ No newline at end of file
@@ -0,0 +1,79 @@
+import threading
+import constants as C
+from headless import step_month
+
+FORECAST_MONTHS = 12
+FORECAST_SEEDS = 4
+
+class Forecaster:
+    """Runs what-if projections for one city on a worker thread; only the latest request is kept.
+
+    Each projection averages several seeded forks and compares building nothing
+    against building the requested structure.
+    """
+    def __init__(self, months=FORECAST_MONTHS, seeds=FORECAST_SEEDS):
+        self.months = months
+        self.seeds = seeds
+
+        self.lock = threading.Lock()
+        self.wakeup = threading.Event()
+        self.pending = None
+        self.results = {}
+
+        self.thread = threading.Thread(target=self._worker, name='forecaster', daemon=True)
+        self.thread.start()
+
+    def request(self, key, engine, village_index, building_type=None):
+        """Queue a forecast; the engine is forked here, on the caller's thread"""
+        with self.lock:
+            if key in self.results or (self.pending and self.pending[0] == key):
+                return
+        forks = [engine.fork(seed=seed) for seed in range(self.seeds)]
+        with self.lock:
+            self.pending = (key, forks, village_index, building_type)
+        self.wakeup.set()
+
+    def result(self, key):
+        with self.lock:
+            return self.results.get(key)
+
+    def _worker(self):
+        while True:
+            self.wakeup.wait()
+            with self.lock:
+                job = self.pending
+                self.pending = None
+                self.wakeup.clear()
+            if job is None:
+                continue
+
+            key, forks, village_index, building_type = job
+            projection = {'baseline': self._project(forks, village_index, None), 'scenario': None}
+            if building_type:
+                projection['scenario'] = self._project(forks, village_index, building_type)
+            with self.lock:
+                # Keep only recent projections; keys include the month, so old ones go stale
+                if len(self.results) > 32:
+                    self.results.clear()
+                self.results[key] = projection
+
+    def _project(self, forks, village_index, building_type):
+        population = [0.0] * self.months
+        resources = {res: [0.0] * self.months for res in C.RESOURCES}
+        built = True
+
+        for base in forks:
+            # Fork again so the baseline and the scenario start from the same state
+            engine = base.fork(seed=base.seed)
+            village = engine.villages[village_index]
+            if building_type:
+                built = village.build_structure(building_type) and built
+
+            for month in range(self.months):
+                if not engine.simulation_complete:
+                    step_month(engine)
+                population[month] += village.population / len(forks)
+                for res in C.RESOURCES:
+                    resources[res][month] += village.resources[res] / len(forks)
+
+        return {'population': population, 'resources': resources, 'built': built}
@@ -1,11 +1,21 @@
 
+import random
+import time
 import constants as C
 from village import Village
 from trade_system import TradeSystem
+from routing import RouteGraph
+from event_store import EventStore, to_month
 from events import EventSystem
 
 class GameEngine:
-    def __init__(self):
+    # Class used for the villages; mirrors of a remote engine substitute their own
+    village_class = Village
+    
+    def __init__(self, seed=None, allocator=None):
+        self.seed = seed
+        self.rng = random.Random(seed)
+        
         self.current_year = C.SIMULATION_START_YEAR
         self.current_month = 1
         self.elapsed_time = 0.0
@@ -13,7 +23,7 @@ class GameEngine:
         
         self.villages = []
         for city_data in C.CITIES:
-            village = Village(
+            village = self.village_class(
                 city_data['name'],
                 city_data['produces'],
                 city_data['pos'],
@@ -21,10 +31,16 @@ class GameEngine:
             )
             self.villages.append(village)
         
+        self.event_store = EventStore([v.name for v in self.villages])
+        self.event_store.month = to_month(self.current_year, self.current_month)
+        self._attach_event_store()
+        
         self._setup_trade_routes()
         
-        self.trade_system = TradeSystem(self.villages)
-        self.event_system = EventSystem(self.villages)
+        self.routes = RouteGraph(self.villages)
+        self.routes.precompute()
+        self.trade_system = TradeSystem(self.villages, self.routes, allocator)
+        self.event_system = EventSystem(self.villages, self.rng, self.event_store)
         
         self.sustainability_score = 500  
         self.sustainability_history = []
@@ -36,6 +52,16 @@ class GameEngine:
         self.total_trades = 0
         self.total_deaths = 0
         self.total_events = 0
+        
+        # Callables run with the engine after every month tick
+        self.month_listeners = []
+        # Wall-clock seconds the last month tick took
+        self.last_month_time = 0.0
+    
+    def _attach_event_store(self):
+        for i, village in enumerate(self.villages):
+            village.index = i
+            village.event_store = self.event_store
     
     def _setup_trade_routes(self):
         """Setup trade route connections between villages"""
@@ -65,7 +91,9 @@ class GameEngine:
             
             if self.month_timer >= C.SECONDS_PER_MONTH:
                 self.month_timer -= C.SECONDS_PER_MONTH
+                started = time.perf_counter()
                 self.update_month()
+                self.last_month_time = time.perf_counter() - started
             
             if self.current_year >= C.SIMULATION_END_YEAR:
                 self.simulation_complete = True
@@ -81,6 +109,27 @@ class GameEngine:
         
         self.event_system.check_and_spawn_events(self.current_year, self.current_month)
         
+        capital, total_tax = self._update_villages()
+        
+        if capital and capital.is_alive:
+            capital.resources['gold'] += total_tax
+            capital.mark_changed()
+        
+        trades = self.trade_system.calculate_trades()
+        self.trade_system.execute_trades(trades)
+        self.total_trades += len(trades)
+        
+        self._update_sustainability_score()
+        
+        for village in self.villages:
+            if not village.is_alive:
+                self.total_deaths += 1
+        
+        for listener in self.month_listeners:
+            listener(self)
+    
+    def _update_villages(self):
+        """Run every living village's month; returns (capital, tax owed to it)"""
         capital = None
         total_tax = 0
         
@@ -100,18 +149,7 @@ class GameEngine:
             
             village.update_month(production, consumption, tax)
         
-        if capital and capital.is_alive:
-            capital.resources['gold'] += total_tax
-        
-        trades = self.trade_system.calculate_trades()
-        self.trade_system.execute_trades(trades)
-        self.total_trades += len(trades)
-        
-        self._update_sustainability_score()
-        
-        for village in self.villages:
-            if not village.is_alive:
-                self.total_deaths += 1
+        return capital, total_tax
     
     def _update_sustainability_score(self):
         score = 0
@@ -163,6 +201,29 @@ class GameEngine:
         self.sustainability_score = int(score)
         self.sustainability_history.append(self.sustainability_score)
     
+    def fork(self, seed=None):
+        """Cheap copy of the simulation state for what-if rollouts.
+        
+        Only live state is copied; histories start empty, so forking cost barely
+        grows with the length of the run (the event store, a few bytes per record,
+        is copied so event counts carry over). The fork draws its own events from seed.
+        """
+        clone = GameEngine.__new__(GameEngine)
+        clone.__dict__.update(self.__dict__)
+        
+        clone.seed = seed
+        clone.rng = random.Random(seed)
+        clone.villages = [v.fork() for v in self.villages]
+        clone.trade_system = self.trade_system.fork(clone.villages)
+        clone.routes = clone.trade_system.routes
+        clone.event_store = self.event_store.fork()
+        clone._attach_event_store()
+        clone.event_system = EventSystem(clone.villages, clone.rng, clone.event_store)
+        clone.sustainability_history = []
+        clone.month_listeners = []
+        clone.is_paused = False
+        return clone
+    
     def get_capital(self):
         for village in self.villages:
             if village.is_capital:
@@ -0,0 +1,203 @@
+import argparse
+import gzip
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+import constants as C
+from allocators import MinCostFlowAllocator
+from game_engine import GameEngine
+from headless import step_month
+from sweep import _parse_seeds, code_version
+
+DEFAULT_TRACE_DIR = 'golden_traces'
+DEFAULT_TOLERANCE = 1e-9
+SHARDED_REGIONS = 3
+
+def _reference(seed):
+    return GameEngine(seed=seed)
+
+def _sharded(seed):
+    from sharded_engine import ShardedEngine
+    return ShardedEngine(seed=seed, regions=SHARDED_REGIONS)
+
+def _mincost(seed):
+    return GameEngine(seed=seed, allocator=MinCostFlowAllocator())
+
+# Engine backends by name; each builds a fresh engine for a seed
+BACKENDS = {
+    'reference': _reference,
+    'sharded': _sharded,
+    'mincost': _mincost,
+}
+
+def _build_scheduled(engine, turn):
+    """Scheduled build: cities take turns building the first thing they can afford"""
+    village = engine.villages[turn % len(engine.villages)]
+    if not village.is_alive:
+        return
+    for building_type in C.BUILDINGS:
+        if village.can_afford_building(building_type):
+            village.build_structure(building_type)
+            return
+
+def record_trace(engine, months=None, build_every=0):
+    """Run the engine to completion (or for a number of months) and return its per-month trace.
+
+    Each month is [month index, score, total trades, villages, trades], where
+    villages lists [population, alive, [stock per resource]] and trades lists
+    [from index, to index, resource, amount sent] in dispatch order. With
+    build_every, a city builds before every build_every-th month, so the
+    trace covers construction too.
+    """
+    index = {v.name: i for i, v in enumerate(engine.villages)}
+    trace = []
+    trades = []
+
+    def record_trade(from_village, to_village, resource, amount, delivered):
+        trades.append([index[from_village.name], index[to_village.name], resource, amount])
+
+    def record_month(engine):
+        month = (engine.current_year - C.SIMULATION_START_YEAR) * 12 + engine.current_month
+        villages = [[v.population, v.is_alive, [v.resources[res] for res in C.RESOURCES]] for v in engine.villages]
+        trace.append([month, engine.sustainability_score, engine.total_trades, villages, list(trades)])
+        trades.clear()
+
+    engine.trade_system.trade_listeners.append(record_trade)
+    engine.month_listeners.append(record_month)
+    stepped = 0
+    try:
+        while not engine.simulation_complete and (months is None or stepped < months):
+            if build_every and stepped % build_every == 0:
+                _build_scheduled(engine, stepped // build_every)
+            step_month(engine)
+            stepped += 1
+    finally:
+        if hasattr(engine, 'close'):
+            engine.close()
+    return trace
+
+def trace_path(directory, seed):
+    return os.path.join(directory, f'seed_{seed:05d}.json.gz')
+
+def save_trace(path, seed, trace, build_every=0):
+    tmp_path = path + '.tmp'
+    with gzip.open(tmp_path, 'wt') as f:
+        json.dump({'seed': seed, 'version': code_version(), 'resources': C.RESOURCES,
+                   'build_every': build_every, 'months': trace}, f)
+    os.replace(tmp_path, path)
+
+def load_trace(path):
+    with gzip.open(path, 'rt') as f:
+        return json.load(f)
+
+def _close(expected, actual, tolerance):
+    if expected == actual:
+        return True
+    if isinstance(expected, bool) or isinstance(actual, bool) or isinstance(expected, str):
+        return False
+    return abs(expected - actual) <= tolerance * max(1.0, abs(expected), abs(actual))
+
+def first_divergence(reference, candidate, tolerance=DEFAULT_TOLERANCE):
+    """Where candidate first departs from reference, as (month, what, expected, actual), or None"""
+    for ref_month, month in zip(reference, candidate):
+        month_index, score, total_trades, villages, trades = ref_month
+        if month[0] != month_index:
+            return (month_index, 'month index', month_index, month[0])
+        # Causes before effects: trades, then village state, then the kingdom totals
+        if len(trades) != len(month[4]):
+            return (month_index, 'trade count', len(trades), len(month[4]))
+        for k, (expected, actual) in enumerate(zip(trades, month[4])):
+            if expected[:3] != actual[:3]:
+                return (month_index, f'trade {k}', expected, actual)
+            if not _close(expected[3], actual[3], tolerance):
+                return (month_index, f'trade {k} amount', expected[3], actual[3])
+
+        for i, (expected, actual) in enumerate(zip(villages, month[3])):
+            if not _close(expected[0], actual[0], tolerance):
+                return (month_index, f'village {i} population', expected[0], actual[0])
+            if expected[1] != actual[1]:
+                return (month_index, f'village {i} alive', expected[1], actual[1])
+            for resource, a, b in zip(C.RESOURCES, expected[2], actual[2]):
+                if not _close(a, b, tolerance):
+                    return (month_index, f'village {i} {resource}', a, b)
+
+        if not _close(score, month[1], tolerance):
+            return (month_index, 'score', score, month[1])
+        if not _close(total_trades, month[2], tolerance):
+            return (month_index, 'total trades', total_trades, month[2])
+
+    if len(reference) != len(candidate):
+        return (min(len(reference), len(candidate)), 'months run', len(reference), len(candidate))
+    return None
+
+def _record_seed(seed, backend, directory, months, build_every):
+    trace = record_trace(BACKENDS[backend](seed), months, build_every)
+    save_trace(trace_path(directory, seed), seed, trace, build_every)
+    return seed
+
+def _check_seed(seed, backend, directory, tolerance, months):
+    path = trace_path(directory, seed)
+    if not os.path.exists(path):
+        return seed, 'missing'
+    saved = load_trace(path)
+    reference = saved['months']
+    # Checks replay the build schedule the trace was recorded with
+    candidate = record_trace(BACKENDS[backend](seed), months, saved.get('build_every', 0))
+    if months is not None:
+        reference = reference[:months]
+    return seed, first_divergence(reference, candidate, tolerance)
+
+def _describe(divergence):
+    month, what, expected, actual = divergence
+    year = C.SIMULATION_START_YEAR + (month - 1) // 12
+    return f"month {month} ({year}-{(month - 1) % 12 + 1:02d}) {what}: expected {expected!r}, got {actual!r}"
+
+def main():
+    parser = argparse.ArgumentParser(description="Record seeded reference traces and check engine backends against them")
+    parser.add_argument('command', choices=['record', 'check'])
+    parser.add_argument('--seeds', default='0-99', help="e.g. 0-299 or 1,5,7")
+    parser.add_argument('--backend', choices=sorted(BACKENDS), default='reference',
+                        help="engine to record with or check")
+    parser.add_argument('--dir', default=DEFAULT_TRACE_DIR, help="where traces are kept")
+    parser.add_argument('--tolerance', type=float, default=DEFAULT_TOLERANCE,
+                        help="relative float tolerance (absolute below 1.0)")
+    parser.add_argument('--months', type=int, default=None, help="only run and compare this many months")
+    parser.add_argument('--build-every', type=int, default=0, metavar='N',
+                        help="when recording, have a city build before every Nth month (checks reuse it)")
+    parser.add_argument('--workers', type=int, default=None)
+    args = parser.parse_args()
+
+    seeds = _parse_seeds(args.seeds)
+    started = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=args.workers) as pool:
+        if args.command == 'record':
+            os.makedirs(args.dir, exist_ok=True)
+            jobs = [pool.submit(_record_seed, seed, args.backend, args.dir, args.months, args.build_every)
+                    for seed in seeds]
+            for job in jobs:
+                job.result()
+            print(f"Recorded {len(seeds)} traces with {args.backend} in {args.dir} "
+                  f"({time.perf_counter() - started:.1f}s)")
+            return
+
+        jobs = [pool.submit(_check_seed, seed, args.backend, args.dir, args.tolerance, args.months)
+                for seed in seeds]
+        failures = 0
+        for job in jobs:
+            seed, divergence = job.result()
+            if divergence == 'missing':
+                print(f"seed {seed}: no trace in {args.dir}; run 'record' first")
+                failures += 1
+            elif divergence:
+                print(f"seed {seed}: {_describe(divergence)}")
+                failures += 1
+
+    print(f"{args.backend}: {len(seeds) - failures}/{len(seeds)} seeds match "
+          f"(tolerance {args.tolerance:g}, {time.perf_counter() - started:.1f}s)")
+    if failures:
+        sys.exit(1)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,98 @@
+import argparse
+import constants as C
+import scenario
+from game_engine import GameEngine
+from allocators import ALLOCATORS, make_allocator
+
+def step_month(engine):
+    """Advance the engine by exactly one month, delivering that month's carts"""
+    engine.update(C.SECONDS_PER_MONTH)
+
+def run_simulation(seed=None, months=None, engine=None):
+    """Run a seeded simulation to completion (or for a number of months) and return its summary"""
+    if engine is None:
+        engine = GameEngine(seed=seed)
+
+    stepped = 0
+    while not engine.simulation_complete and (months is None or stepped < months):
+        step_month(engine)
+        stepped += 1
+
+    return summarize(engine)
+
+def summarize(engine):
+    alive = [v for v in engine.villages if v.is_alive]
+    return {
+        'seed': engine.seed,
+        'year': engine.current_year,
+        'month': engine.current_month,
+        'alive_cities': len(alive),
+        'total_cities': len(engine.villages),
+        'total_population': sum(v.population for v in alive),
+        'total_trades': engine.total_trades,
+        'total_events': len(engine.event_system.event_history),
+        'sustainability_score': engine.sustainability_score,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the Windsor simulation headless")
+    parser.add_argument('--seed', type=int, default=None)
+    parser.add_argument('--months', type=int, default=None)
+    parser.add_argument('--regions', type=int, default=None,
+                        help="simulate villages in this many region worker processes")
+    parser.add_argument('--ledger', default=None, metavar='PATH',
+                        help="export every trade to PATH (.csv, otherwise the columnar ledger format)")
+    parser.add_argument('--scenario', default=None, metavar='PATH',
+                        help="load cities, buildings, events and tunables from a .json or .toml file")
+    parser.add_argument('--allocator', choices=sorted(ALLOCATORS), default='greedy',
+                        help="how each month's surpluses are matched to deficits")
+    parser.add_argument('--memory-report', default=None, metavar='PATH',
+                        help="trace allocations with tracemalloc and write a per-year growth report to PATH")
+    parser.add_argument('--memory-budget', type=float, default=None, metavar='MB',
+                        help="flag the memory report if traced memory peaks above this")
+    args = parser.parse_args()
+
+    tracker = None
+    if args.memory_report:
+        from memory_profile import MemoryTracker
+        tracker = MemoryTracker(budget_mb=args.memory_budget)
+        tracker.start()
+
+    if args.scenario:
+        scenario.apply_scenario(scenario.load_scenario(args.scenario))
+
+    if args.regions:
+        from sharded_engine import ShardedEngine
+        engine = ShardedEngine(seed=args.seed, regions=args.regions, allocator=make_allocator(args.allocator))
+    else:
+        engine = GameEngine(seed=args.seed, allocator=make_allocator(args.allocator))
+
+    ledger = None
+    if args.ledger:
+        from trade_ledger import TradeLedger
+        ledger = TradeLedger()
+        ledger.attach(engine)
+
+    if tracker:
+        tracker.attach(engine)
+
+    try:
+        summary = run_simulation(months=args.months, engine=engine)
+    finally:
+        if args.regions:
+            engine.close()
+
+    if ledger:
+        if args.ledger.endswith('.csv'):
+            ledger.to_csv(args.ledger)
+        else:
+            ledger.save(args.ledger)
+    if tracker:
+        tracker.write_report(args.memory_report)
+    for key, value in summary.items():
+        print(f"{key}: {value}")
+    if tracker and tracker.over_budget():
+        raise SystemExit(f"Traced memory exceeded the {args.memory_budget} MB budget; see {args.memory_report}")
+
+if __name__ == "__main__":
+    main()
@@ -1,43 +1,111 @@
+import argparse
 import pygame
 import sys
 from game_engine import GameEngine
+from allocators import ALLOCATORS, make_allocator
 from ui_renderer import UIRenderer
-
-pygame.init()
+from replay import ReplayRecorder
+from analytics import RunAnalytics
+import scenario
 
 SCREEN_WIDTH = 1600
 SCREEN_HEIGHT = 900
 FPS = 60
 
 def main():
+    parser = argparse.ArgumentParser(description="Windsor Kingdom Resource Management System")
+    parser.add_argument('--serve', type=int, nargs='?', const=8765, default=None, metavar='PORT',
+                        help="stream state deltas to remote viewers on this port")
+    parser.add_argument('--replay', default='replays/last_run.wkr', metavar='PATH',
+                        help="where to record the run's replay (empty to disable)")
+    parser.add_argument('--scenario', default=None, metavar='PATH',
+                        help="load cities, buildings, events and tunables from a .json or .toml file")
+    parser.add_argument('--allocator', choices=sorted(ALLOCATORS), default='greedy',
+                        help="how each month's surpluses are matched to deficits")
+    parser.add_argument('--memory-report', default=None, metavar='PATH',
+                        help="trace allocations with tracemalloc and write a per-year growth report to PATH on exit")
+    parser.add_argument('--split-process', action='store_true',
+                        help="run the simulation in its own process, sharing its state with the renderer through shared memory")
+    args = parser.parse_args()
+    
+    tracker = None
+    if args.memory_report:
+        from memory_profile import MemoryTracker
+        tracker = MemoryTracker()
+        tracker.start()
+    
+    if args.scenario:
+        scenario.apply_scenario(scenario.load_scenario(args.scenario))
+    
+    pygame.init()
     screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
     pygame.display.set_caption("Windsor Kingdom Resource Management System")
     clock = pygame.time.Clock()
     
-    engine = GameEngine()
-    renderer = UIRenderer(screen, engine)
+    if args.split_process:
+        from shared_state import EngineView
+        engine = EngineView(allocator_name=args.allocator, scenario_path=args.scenario)
+    else:
+        engine = GameEngine(allocator=make_allocator(args.allocator))
+    
+    recorder = None
+    if args.replay:
+        recorder = ReplayRecorder(args.replay)
+        recorder.attach(engine)
+    
+    analytics = RunAnalytics()
+    analytics.attach(engine)
+    
+    renderer = UIRenderer(screen, engine, replay_path=args.replay, analytics=analytics)
+    
+    if tracker:
+        tracker.attach(engine)
+    
+    if args.serve is not None:
+        from state_server import StateServer
+        server = StateServer(port=args.serve)
+        server.attach(engine)
+        try:
+            server.start()
+        except OSError as exc:
+            parser.error(f"--serve {args.serve}: {exc.strerror or exc}")
+        print(f"Streaming state on port {server.port}")
+    
+    if args.split_process:
+        engine.start()
     
     running = True
     frame_count = 0
     while running:
         dt = clock.tick(FPS) / 1000.0
+        # The frame's own work, without the sleep tick() spends holding the FPS cap
+        frame_started = renderer.hud.clock()
         
         for event in pygame.event.get():
             if event.type == pygame.QUIT:
                 running = False
             renderer.handle_event(event)
         
+        started = renderer.hud.clock()
         engine.update(dt)
+        renderer.hud.lap('update', started)
         
         if frame_count % 60 == 0:
             print(f"Year: {engine.current_year}, Month: {engine.current_month}, Carts: {len(engine.trade_system.active_carts)}, Alive: {sum(1 for v in engine.villages if v.is_alive)}")
         
         renderer.render()
+        renderer.hud.frame(frame_started, dt)
         
         pygame.display.flip()
         
         frame_count += 1
     
+    if args.split_process:
+        engine.close()
+    if recorder:
+        recorder.close()
+    if tracker:
+        tracker.write_report(args.memory_report)
     pygame.quit()
     sys.exit()
 
@@ -0,0 +1,103 @@
+import os
+import tracemalloc
+
+TRACE_FRAMES = 1
+TOP_GROWTH_LINES = 15
+
+# Allocations are attributed by the source file that made them
+SUBSYSTEMS = {
+    'villages': ['village.py'],
+    'trade': ['trade_system.py', 'allocators.py', 'routing.py', 'trade_ledger.py'],
+    'events': ['events.py', 'event_store.py'],
+    'engine': ['game_engine.py', 'sharded_engine.py', 'shared_state.py', 'scenario.py'],
+    'recording': ['replay.py', 'analytics.py', 'state_server.py'],
+    'renderer': ['ui_renderer.py', 'asset_loader.py', 'spatial_index.py', 'perf_hud.py', 'forecast.py'],
+}
+
+_FILE_SUBSYSTEM = {filename: name for name, filenames in SUBSYSTEMS.items() for filename in filenames}
+
+class MemoryTracker:
+    """Opt-in tracemalloc profile of a run, sampled at every simulated year boundary.
+
+    Each sample sums traced memory per subsystem. The first and last
+    snapshots are kept so the report can list the lines that grew the most.
+    """
+    def __init__(self, budget_mb=None):
+        self.budget_mb = budget_mb
+        self.samples = []
+        self.first = None
+        self.last = None
+
+    def start(self):
+        """Begin tracing; call before building the engine so its setup is counted too"""
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(TRACE_FRAMES)
+
+    def attach(self, engine):
+        self.start()
+        self.sample(engine)
+        engine.month_listeners.append(self.record_month)
+
+    def record_month(self, engine):
+        if engine.current_month == 1:
+            self.sample(engine)
+
+    def sample(self, engine):
+        snapshot = tracemalloc.take_snapshot().filter_traces([
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, __file__),
+        ])
+        by_subsystem = {name: 0 for name in SUBSYSTEMS}
+        by_subsystem['other'] = 0
+        for stat in snapshot.statistics('filename'):
+            filename = os.path.basename(stat.traceback[0].filename)
+            by_subsystem[_FILE_SUBSYSTEM.get(filename, 'other')] += stat.size
+
+        current, peak = tracemalloc.get_traced_memory()
+        self.samples.append((engine.current_year, current, peak, by_subsystem))
+        if self.first is None:
+            self.first = snapshot
+        self.last = snapshot
+
+    def over_budget(self):
+        if self.budget_mb is None or not self.samples:
+            return False
+        return max(peak for _, _, peak, _ in self.samples) > self.budget_mb * 1024 * 1024
+
+    def report(self):
+        columns = list(SUBSYSTEMS) + ['other']
+        lines = ["Memory by simulated year (KiB)", ""]
+        lines.append(f"{'year':>6} {'traced':>9} {'peak':>9} " + " ".join(f"{name:>9}" for name in columns))
+        for year, current, peak, by_subsystem in self.samples:
+            lines.append(f"{year:>6} {current / 1024:>9.1f} {peak / 1024:>9.1f} "
+                         + " ".join(f"{by_subsystem[name] / 1024:>9.1f}" for name in columns))
+
+        if len(self.samples) > 1:
+            first, last = self.samples[0][3], self.samples[-1][3]
+            years = self.samples[-1][0] - self.samples[0][0]
+            lines.append("")
+            lines.append(f"Growth over {years} years (KiB/year)")
+            for name in columns:
+                lines.append(f"  {name:<10} {(last[name] - first[name]) / 1024 / max(years, 1):>9.1f}")
+
+        if self.first is not None and self.last is not self.first:
+            lines.append("")
+            lines.append("Largest growth by line")
+            for stat in self.last.compare_to(self.first, 'lineno')[:TOP_GROWTH_LINES]:
+                frame = stat.traceback[0]
+                lines.append(f"  {stat.size_diff / 1024:>+9.1f} KiB  {stat.count_diff:>+7} blocks  "
+                             f"{os.path.basename(frame.filename)}:{frame.lineno}")
+
+        if self.budget_mb is not None:
+            lines.append("")
+            status = "OVER BUDGET" if self.over_budget() else "within budget"
+            peak = max(peak for _, _, peak, _ in self.samples) / 1024 / 1024
+            lines.append(f"Peak {peak:.1f} MiB, budget {self.budget_mb} MiB: {status}")
+        return "\n".join(lines) + "\n"
+
+    def write_report(self, path):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(path, 'w') as f:
+            f.write(self.report())
@@ -0,0 +1,100 @@
+import time
+from array import array
+import pygame
+
+SAMPLE_COUNT = 240
+SECTIONS = ['update', 'background', 'routes', 'carts', 'cities', 'overlay', 'page']
+
+class RingBuffer:
+    """Fixed number of float samples; the oldest is overwritten once full"""
+    def __init__(self, size=SAMPLE_COUNT):
+        self.samples = array('d', bytes(size * 8))
+        self.size = size
+        self.count = 0
+        self.pos = 0
+
+    def add(self, value):
+        self.samples[self.pos] = value
+        self.pos = (self.pos + 1) % self.size
+        if self.count < self.size:
+            self.count += 1
+
+    def mean(self):
+        return sum(self.samples[:self.count]) / self.count if self.count else 0.0
+
+    def percentiles(self, *points):
+        ordered = sorted(self.samples[:self.count])
+        if not ordered:
+            return [0.0] * len(points)
+        return [ordered[min(len(ordered) - 1, int(len(ordered) * p / 100))] for p in points]
+
+class PerfHUD:
+    """Toggleable overlay of frame times and the cost of each update and render pass.
+
+    Frame percentiles are the time spent handling events, updating and
+    rendering, measured with perf_counter; FPS comes from the tick interval,
+    which also includes the sleep that holds the frame cap. Timing is only
+    taken while the overlay is shown. Hidden, clock() and lap() return at
+    once, so the instrumented code pays one call each.
+    """
+    def __init__(self, engine, font):
+        self.engine = engine
+        self.font = font
+        self.visible = False
+        self.frames = RingBuffer()
+        self.intervals = RingBuffer()
+        self.sections = {name: RingBuffer() for name in SECTIONS}
+
+    def toggle(self):
+        self.visible = not self.visible
+        # Start from fresh samples so old ones don't mix with the new run
+        self.frames = RingBuffer()
+        self.intervals = RingBuffer()
+        self.sections = {name: RingBuffer() for name in SECTIONS}
+
+    def clock(self):
+        return time.perf_counter() if self.visible else 0.0
+
+    def lap(self, section, started):
+        """Record the time since started under section and return now, for chaining passes"""
+        if not self.visible:
+            return 0.0
+        now = time.perf_counter()
+        self.sections[section].add((now - started) * 1000)
+        return now
+
+    def frame(self, started, dt):
+        """Record a frame's work since started, and dt, the tick interval it ran in"""
+        if self.visible:
+            self.frames.add((time.perf_counter() - started) * 1000)
+            self.intervals.add(dt * 1000)
+
+    def render(self, screen):
+        if not self.visible:
+            return
+
+        p50, p95, p99 = self.frames.percentiles(50, 95, 99)
+        mean = self.intervals.mean()
+        rows = [
+            ("FPS", f"{1000 / mean:.0f}" if mean else "-"),
+            ("frame", f"p50 {p50:.1f}  p95 {p95:.1f}  p99 {p99:.1f} ms"),
+        ]
+        for name, samples in self.sections.items():
+            if samples.count:
+                rows.append((name, f"{samples.mean():.2f} ms  (p95 {samples.percentiles(95)[0]:.2f})"))
+        rows.append(("carts", str(len(self.engine.trade_system.active_carts))))
+        rows.append(("last month", f"{self.engine.last_month_time * 1000:.2f} ms"))
+
+        line_height = self.font.get_linesize()
+        width = 360
+        height = line_height * len(rows) + 12
+        x = screen.get_width() - width - 10
+        y = 10
+
+        panel = pygame.Surface((width, height), pygame.SRCALPHA)
+        panel.fill((0, 0, 0, 170))
+        screen.blit(panel, (x, y))
+        for i, (label, value) in enumerate(rows):
+            row_y = y + 6 + i * line_height
+            screen.blit(self.font.render(label, True, (160, 200, 160)), (x + 8, row_y))
+            screen.blit(self.font.render(value, True, (220, 255, 220)), (x + 108, row_y))
@@ -0,0 +1,295 @@
+import bisect
+import os
+import struct
+import constants as C
+import scenario as S
+
+MAGIC = b'WKRP'
+VERSION = 3
+KEYFRAME_INTERVAL = 12
+
+_HEADER = struct.Struct('<4sHHB')       # magic, version, village count, resource count
+_RECORD = struct.Struct('<cII')         # kind, month, payload length
+_INDEX = struct.Struct('<cIQ')          # kind, month, file offset
+_TOTALS = struct.Struct('<iIH')         # score, total trades, village count
+_COUNT = struct.Struct('<H')
+_EVENT = struct.Struct('<BB')           # event id, affected count
+_CART = struct.Struct('<HHB')           # from, to, resource count
+_SHIPMENT = struct.Struct('<Bf')        # resource id, amount
+
+def _village_struct(num_resources):
+    # index, population, alive, buildings, events, growth, resources
+    return struct.Struct(f'<HqBHHd{num_resources}d')
+
+def _pack_names(names):
+    parts = [_COUNT.pack(len(names))]
+    for name in names:
+        data = name.encode()
+        parts.append(_COUNT.pack(len(data)) + data)
+    return b''.join(parts)
+
+def _read_names(f, count=None):
+    if count is None:
+        (count,) = _COUNT.unpack(f.read(_COUNT.size))
+    names = []
+    for _ in range(count):
+        (length,) = _COUNT.unpack(f.read(_COUNT.size))
+        names.append(f.read(length).decode())
+    return names
+
+def _scenario_tables():
+    """Names behind the resource columns and the event and building ids and bits"""
+    return list(C.RESOURCES), list(S.TABLES.event_names), list(S.TABLES.building_names)
+
+def month_index(engine):
+    return (engine.current_year - C.SIMULATION_START_YEAR) * 12 + engine.current_month
+
+def _village_row(i, village):
+    return (i, village.population, village.is_alive, village.building_mask, village.event_mask, village.growth_rate,
+            *(village.resources[res] for res in C.RESOURCES))
+
+class ReplayRecorder:
+    """Month listener that appends keyframes and per-month deltas to a replay file.
+
+    The file is append-only and flushed after each record, and a sidecar .idx
+    file lists each record's month and offset so readers can seek.
+    """
+    def __init__(self, path, keyframe_interval=KEYFRAME_INTERVAL):
+        self.path = path
+        self.keyframe_interval = keyframe_interval
+        self.rows = None
+        self.event_count = 0
+        self.months_since_keyframe = 0
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.file = open(path, 'wb')
+        self.index_file = open(path + '.idx', 'wb')
+
+    def attach(self, engine):
+        self.row_struct = _village_struct(len(C.RESOURCES))
+        self.file.write(_HEADER.pack(MAGIC, VERSION, len(engine.villages), len(C.RESOURCES)))
+        for village in engine.villages:
+            name = village.name.encode()
+            self.file.write(_COUNT.pack(len(name)) + name)
+        # Ids, bits and columns only mean something next to the scenario's names
+        for names in _scenario_tables():
+            self.file.write(_pack_names(names))
+
+        self.event_count = len(engine.event_store.starts)
+        self._write_keyframe(engine)
+        engine.month_listeners.append(self.record)
+
+    def record(self, engine):
+        self.months_since_keyframe += 1
+        if self.months_since_keyframe >= self.keyframe_interval:
+            self._write_keyframe(engine)
+        else:
+            self._write_delta(engine)
+
+    def close(self):
+        if not self.file.closed:
+            self.file.close()
+            self.index_file.close()
+
+    def _write_keyframe(self, engine):
+        self.rows = [_village_row(i, v) for i, v in enumerate(engine.villages)]
+        payload = [_TOTALS.pack(engine.sustainability_score, engine.total_trades, len(self.rows))]
+        payload.extend(self.row_struct.pack(*row) for row in self.rows)
+        # Keyframes also carry the month's events and carts so every month has them
+        payload.append(self._pack_activity(engine))
+        self._write(b'K', month_index(engine), b''.join(payload))
+        self.months_since_keyframe = 0
+
+    def _write_delta(self, engine):
+        changed = []
+        for i, village in enumerate(engine.villages):
+            row = _village_row(i, village)
+            if row != self.rows[i]:
+                self.rows[i] = row
+                changed.append(row)
+
+        payload = [_TOTALS.pack(engine.sustainability_score, engine.total_trades, len(changed))]
+        payload.extend(self.row_struct.pack(*row) for row in changed)
+        payload.append(self._pack_activity(engine))
+        self._write(b'D', month_index(engine), b''.join(payload))
+
+    def _pack_activity(self, engine):
+        store = engine.event_store
+        new_events = range(self.event_count, len(store.starts))
+        self.event_count = len(store.starts)
+
+        names = {v.name: i for i, v in enumerate(engine.villages)}
+        parts = [_COUNT.pack(len(new_events))]
+        for k in new_events:
+            start, size = store.starts[k], store.sizes[k]
+            parts.append(_EVENT.pack(store.types[start], size))
+            parts.extend(_COUNT.pack(store.villages[r]) for r in range(start, start + size))
+
+        carts = engine.trade_system.last_dispatched
+        parts.append(_COUNT.pack(len(carts)))
+        for cart in carts:
+            parts.append(_CART.pack(names[cart.from_village], names[cart.to_village], len(cart.resources)))
+            parts.extend(_SHIPMENT.pack(C.RESOURCES.index(res), amount) for res, amount in cart.resources.items())
+        return b''.join(parts)
+
+    def _write(self, kind, month, payload):
+        offset = self.file.tell()
+        self.file.write(_RECORD.pack(kind, month, len(payload)))
+        self.file.write(payload)
+        self.file.flush()
+        self.index_file.write(_INDEX.pack(kind, month, offset))
+        self.index_file.flush()
+
+class ReplayFrame:
+    """Reconstructed kingdom state at one month of a replay"""
+    def __init__(self, names):
+        self.names = names
+        self.month = 0
+        self.score = 0
+        self.total_trades = 0
+        self.rows = [None] * len(names)
+        self.events = []
+        self.carts = []
+
+    def time_string(self):
+        month_names = ['Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun',
+                       'Jul', 'Aug', 'Sep', 'Oct', 'Nov', 'Dec']
+        year = C.SIMULATION_START_YEAR + (self.month - 1) // 12
+        return f"{month_names[(self.month - 1) % 12]} {year}"
+
+    def village(self, i):
+        _, population, alive, buildings, events, growth, *resources = self.rows[i]
+        return {
+            'name': self.names[i],
+            'population': population,
+            'alive': bool(alive),
+            'growth_rate': growth,
+            'resources': dict(zip(C.RESOURCES, resources)),
+            'buildings': [b for b, bit in S.TABLES.building_bits.items() if buildings & bit],
+            'events': [e for e, bit in S.TABLES.event_bits.items() if events & bit],
+        }
+
+    def copy(self):
+        frame = ReplayFrame(self.names)
+        frame.month = self.month
+        frame.score = self.score
+        frame.total_trades = self.total_trades
+        frame.rows = list(self.rows)
+        frame.events = self.events
+        frame.carts = self.carts
+        return frame
+
+class ReplayReader:
+    """Random access to a replay: seek to the nearest keyframe, then apply deltas.
+
+    Frames hold rows, masks and ids as recorded, so the reader refuses a
+    replay whose resource, event or building names differ from the loaded
+    scenario's.
+    """
+    def __init__(self, path):
+        self.path = path
+        self.file = open(path, 'rb')
+
+        magic, version, count, num_resources = _HEADER.unpack(self.file.read(_HEADER.size))
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"{path} is not a version {VERSION} replay file")
+        self.row_struct = _village_struct(num_resources)
+        self.names = _read_names(self.file, count)
+        self.resources, self.event_names, self.building_names = (_read_names(self.file) for _ in range(3))
+        recorded = (self.resources, self.event_names, self.building_names)
+        for what, names, current in zip(('resources', 'events', 'buildings'), recorded, _scenario_tables()):
+            if names != current:
+                self.file.close()
+                raise ValueError(f"{path} was recorded under a different scenario ({what} {', '.join(names)}, "
+                                 f"loaded {', '.join(current)}); load the same --scenario to view it")
+
+        self.cached = None
+        self.refresh()
+
+    def refresh(self):
+        """Re-read the index; a replay still being recorded grows between calls"""
+        self.months = []
+        self.offsets = []
+        self.keyframes = []
+        with open(self.path + '.idx', 'rb') as f:
+            data = f.read()
+        usable = len(data) - len(data) % _INDEX.size
+        for kind, month, offset in _INDEX.iter_unpack(data[:usable]):
+            if kind == b'K':
+                self.keyframes.append(len(self.months))
+            self.months.append(month)
+            self.offsets.append(offset)
+
+    @property
+    def first_month(self):
+        return self.months[0] if self.months else 0
+
+    @property
+    def last_month(self):
+        return self.months[-1] if self.months else 0
+
+    def frame_at(self, month):
+        """State at the given month index (clamped to the recorded range)"""
+        if not self.months:
+            return None
+        position = max(0, bisect.bisect_right(self.months, month) - 1)
+
+        # Continue from the cached frame when it lies between the keyframe and the target
+        k = bisect.bisect_right(self.keyframes, position) - 1
+        keyframe_position = self.keyframes[max(k, 0)]
+        cached = self.cached
+        if cached and keyframe_position <= cached[0] <= position:
+            start, frame = cached[0] + 1, cached[1].copy()
+        else:
+            start, frame = keyframe_position, ReplayFrame(self.names)
+
+        for i in range(start, position + 1):
+            self._apply(i, frame)
+
+        self.cached = (position, frame)
+        return frame
+
+    def _apply(self, i, frame):
+        self.file.seek(self.offsets[i])
+        kind, month, length = _RECORD.unpack(self.file.read(_RECORD.size))
+        payload = self.file.read(length)
+
+        score, total_trades, count = _TOTALS.unpack_from(payload, 0)
+        offset = _TOTALS.size
+        frame.month = month
+        frame.score = score
+        frame.total_trades = total_trades
+        for _ in range(count):
+            row = self.row_struct.unpack_from(payload, offset)
+            frame.rows[row[0]] = row
+            offset += self.row_struct.size
+
+        frame.events = []
+        (num_events,) = _COUNT.unpack_from(payload, offset)
+        offset += _COUNT.size
+        for _ in range(num_events):
+            event_id, affected = _EVENT.unpack_from(payload, offset)
+            offset += _EVENT.size
+            villages = []
+            for _ in range(affected):
+                villages.append(self.names[_COUNT.unpack_from(payload, offset)[0]])
+                offset += _COUNT.size
+            frame.events.append((self.event_names[event_id], villages))
+
+        frame.carts = []
+        (num_carts,) = _COUNT.unpack_from(payload, offset)
+        offset += _COUNT.size
+        for _ in range(num_carts):
+            source, target, shipments = _CART.unpack_from(payload, offset)
+            offset += _CART.size
+            resources = {}
+            for _ in range(shipments):
+                resource_id, amount = _SHIPMENT.unpack_from(payload, offset)
+                offset += _SHIPMENT.size
+                resources[self.resources[resource_id]] = amount
+            frame.carts.append((self.names[source], self.names[target], resources))
+
+    def close(self):
+        self.file.close()
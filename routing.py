@@ -0,0 +1,141 @@
+import bisect
+import heapq
+import math
+
+class RouteGraph:
+    """Shortest paths over the connected_routes road network.
+
+    Paths are computed lazily, one Dijkstra tree per source, and kept until a
+    change in blocked cities could affect them. Blocked cities cannot be
+    travelled through.
+    """
+    def __init__(self, villages):
+        self.positions = [v.position for v in villages]
+        self.index = {v.name: i for i, v in enumerate(villages)}
+
+        self.neighbors = [dict() for _ in villages]
+        for i, village in enumerate(villages):
+            for name in village.connected_routes:
+                j = self.index.get(name)
+                if j is None or j == i:
+                    continue
+                dx = self.positions[i][0] - self.positions[j][0]
+                dy = self.positions[i][1] - self.positions[j][1]
+                length = math.sqrt(dx*dx + dy*dy)
+                self.neighbors[i][j] = length
+                self.neighbors[j][i] = length
+
+        self.blocked = frozenset()
+        self.trees = {}
+        self.polylines = {}
+
+    def fork(self):
+        clone = RouteGraph.__new__(RouteGraph)
+        clone.positions = self.positions
+        clone.index = self.index
+        clone.neighbors = self.neighbors
+        clone.blocked = self.blocked
+        clone.trees = dict(self.trees)
+        clone.polylines = {src: dict(lines) for src, lines in self.polylines.items()}
+        return clone
+
+    def precompute(self):
+        """Build every shortest-path tree up front (all pairs)"""
+        for source in range(len(self.positions)):
+            self._tree(source)
+
+    def set_blocked(self, blocked):
+        """Update the blocked cities, dropping only the trees the change can affect"""
+        blocked = frozenset(blocked)
+        if blocked == self.blocked:
+            return
+
+        newly_blocked = blocked - self.blocked
+        unblocked = self.blocked - blocked
+        self.blocked = blocked
+
+        for source in list(self.trees):
+            dist, prev, parents = self.trees[source]
+            # A newly blocked city only matters if some path ran through it
+            stale = any(b in parents for b in newly_blocked)
+            # A reopened city was already reached as an endpoint; it only matters if going
+            # on through it shortens the path to a neighbour, or reaches one for the first time
+            if not stale:
+                stale = any(dist[b] + length < dist[n]
+                            for b in unblocked for n, length in self.neighbors[b].items())
+            if stale:
+                del self.trees[source]
+                self.polylines.pop(source, None)
+
+    def _tree(self, source):
+        tree = self.trees.get(source)
+        if tree is not None:
+            return tree
+
+        n = len(self.positions)
+        dist = [math.inf] * n
+        prev = [-1] * n
+        dist[source] = 0.0
+        heap = [(0.0, source)]
+
+        while heap:
+            d, node = heapq.heappop(heap)
+            if d > dist[node]:
+                continue
+            # Paths may end at a blocked city but never pass through one
+            if node != source and node in self.blocked:
+                continue
+            for neighbor, length in self.neighbors[node].items():
+                nd = d + length
+                if nd < dist[neighbor]:
+                    dist[neighbor] = nd
+                    prev[neighbor] = node
+                    heapq.heappush(heap, (nd, neighbor))
+
+        parents = {p for p in prev if p != -1 and p != source}
+        tree = (dist, prev, parents)
+        self.trees[source] = tree
+        return tree
+
+    def distance(self, source, target):
+        """Road distance between two city indices; inf when unreachable"""
+        return self._tree(source)[0][target]
+
+    def path(self, source, target):
+        """City indices along the shortest path, or None when unreachable"""
+        dist, prev, _ = self._tree(source)
+        if math.isinf(dist[target]):
+            return None
+        nodes = [target]
+        while nodes[-1] != source:
+            nodes.append(prev[nodes[-1]])
+        nodes.reverse()
+        return nodes
+
+    def polyline(self, source, target):
+        """(points, cumulative arc lengths) for the shortest path, cached per source"""
+        lines = self.polylines.setdefault(source, {})
+        line = lines.get(target)
+        if line is None:
+            nodes = self.path(source, target)
+            if nodes is None:
+                nodes = [source, target]
+            points = [self.positions[i] for i in nodes]
+            lengths = [0.0]
+            for a, b in zip(points, points[1:]):
+                lengths.append(lengths[-1] + math.sqrt((b[0] - a[0]) ** 2 + (b[1] - a[1]) ** 2))
+            line = (points, lengths)
+            lines[target] = line
+        return line
+
+def point_along(points, lengths, travelled):
+    """Position after travelling a distance along a polyline with cumulative lengths"""
+    if travelled <= 0 or len(points) < 2:
+        return points[0]
+    if travelled >= lengths[-1]:
+        return points[-1]
+    i = bisect.bisect_right(lengths, travelled) - 1
+    segment = lengths[i + 1] - lengths[i]
+    t = (travelled - lengths[i]) / segment if segment else 0.0
+    a, b = points[i], points[i + 1]
+    return (a[0] + (b[0] - a[0]) * t, a[1] + (b[1] - a[1]) * t)
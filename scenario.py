@@ -0,0 +1,180 @@
+import json
+import os
+import constants as C
+
+# Buildings and event types are bits in per-village masks; tables are sized 2**bits
+MAX_TABLE_BITS = 16
+
+TUNABLE_TYPES = (int, float, type(None))
+
+def _combine(per_bit, empty, merge):
+    """Table over every mask of len(per_bit) bits, built from the table for the mask minus its lowest bit"""
+    table = [empty] * (1 << len(per_bit))
+    for mask in range(1, len(table)):
+        low = mask & -mask
+        table[mask] = merge(table[mask ^ low], per_bit[low.bit_length() - 1])
+    return table
+
+class ScenarioTables:
+    """Integer-indexed effect tables compiled from the loaded scenario.
+
+    Villages keep bitmasks of their buildings and active events, so each
+    effect is a list lookup by mask instead of a string comparison.
+    """
+    def __init__(self):
+        self.resource_ids = {res: i for i, res in enumerate(C.RESOURCES)}
+        self.event_names = list(C.EVENT_TYPES)
+        self.event_ids = {event_type: i for i, event_type in enumerate(self.event_names)}
+        self.event_bits = {event_type: 1 << i for i, event_type in enumerate(self.event_names)}
+        self.building_names = list(C.BUILDINGS)
+        self.building_bits = {building_type: 1 << i for i, building_type in enumerate(self.building_names)}
+
+        if len(self.event_names) > MAX_TABLE_BITS or len(self.building_names) > MAX_TABLE_BITS:
+            raise ValueError(f"Scenarios support at most {MAX_TABLE_BITS} event types and building types")
+
+        events = [C.EVENT_TYPES[event_type] for event_type in self.event_names]
+        buildings = [C.BUILDINGS[building_type] for building_type in self.building_names]
+
+        self.trade_block_mask = 0
+        self.lethal_mask = 0
+        for i, event in enumerate(events):
+            if event.get('blocks_trade'):
+                self.trade_block_mask |= 1 << i
+            if event.get('death_rate'):
+                self.lethal_mask |= 1 << i
+
+        # Fraction of every stock left after the event strikes
+        self.keep_fraction = [1.0 - event.get('steal_fraction', 0.0) for event in events]
+
+        # blocked_resources[event_mask]: bitmask of resources nobody can produce
+        blocked = []
+        for event in events:
+            bits = 0
+            for res in event.get('blocks_production', ()):
+                bits |= 1 << self.resource_ids[res]
+            blocked.append(bits)
+        self.blocked_resources = _combine(blocked, 0, lambda a, b: a | b)
+
+        # Per building mask: production and gold multipliers, and the share of a
+        # blocked resource that still gets produced
+        self.production_multiplier = _combine(
+            [b.get('production_multiplier', 1.0) for b in buildings], 1.0, lambda a, b: a * b)
+        self.gold_multiplier = _combine(
+            [b.get('gold_multiplier', 1.0) for b in buildings], 1.0, lambda a, b: a * b)
+        protects = [[b.get('protects', {}).get(res, 0.0) for res in C.RESOURCES] for b in buildings]
+        self.protection = _combine(protects, [0.0] * len(C.RESOURCES),
+                                   lambda a, b: [max(x, y) for x, y in zip(a, b)])
+
+        # death_rate[building_mask][event_id]: monthly share of the population an event kills
+        death_multiplier = _combine(
+            [b.get('death_rate_multiplier', 1.0) for b in buildings], 1.0, lambda a, b: a * b)
+        self.death_rate = [[event.get('death_rate', 0.0) * multiplier for event in events]
+                           for multiplier in death_multiplier]
+
+def compile_tables():
+    """Rebuild TABLES from the scenario currently held in constants"""
+    global TABLES
+    TABLES = ScenarioTables()
+    return TABLES
+
+def load_scenario(path):
+    """Read a scenario from a .json or .toml file"""
+    if path.endswith('.toml'):
+        import tomllib
+        with open(path, 'rb') as f:
+            return tomllib.load(f)
+    with open(path) as f:
+        return json.load(f)
+
+def _tuples(entry, keys):
+    entry = dict(entry)
+    for key in keys:
+        if key in entry:
+            entry[key] = tuple(entry[key])
+    return entry
+
+def apply_scenario(data):
+    """Install a scenario into constants and compile its lookup tables.
+
+    Every section is optional; missing ones keep the current values. Load
+    the scenario before building a GameEngine.
+    """
+    for name, value in data.get('tunables', {}).items():
+        if not name.isupper() or not isinstance(getattr(C, name, ''), TUNABLE_TYPES):
+            raise ValueError(f"Not a scenario tunable: {name}")
+        setattr(C, name, value)
+    if 'tunables' in data:
+        C.SECONDS_PER_YEAR = C.REAL_TIME_DURATION / (C.SIMULATION_END_YEAR - C.SIMULATION_START_YEAR)
+        C.SECONDS_PER_MONTH = C.SECONDS_PER_YEAR / 12
+
+    if 'resources' in data:
+        C.RESOURCES = list(data['resources'])
+        colors = {res: tuple(color) for res, color in data.get('resource_colors', {}).items()}
+        C.RESOURCE_COLORS = {res: colors.get(res, C.RESOURCE_COLORS.get(res, C.COLOR_ROUTE))
+                             for res in C.RESOURCES}
+    if 'cities' in data:
+        cities = []
+        for city in data['cities']:
+            city = _tuples(city, ['pos'])
+            city.setdefault('produces', None)
+            cities.append(city)
+        C.CITIES = cities
+    if 'events' in data:
+        C.EVENT_TYPES = {name: _tuples(event, ['color']) for name, event in data['events'].items()}
+    if 'buildings' in data:
+        C.BUILDINGS = {name: _tuples(building, ['color']) for name, building in data['buildings'].items()}
+
+    _validate()
+    return compile_tables()
+
+def _validate():
+    resources = set(C.RESOURCES)
+    for city in C.CITIES:
+        if city['produces'] is not None and city['produces'] not in resources:
+            raise ValueError(f"{city['name']} produces unknown resource {city['produces']!r}")
+    for name, event in C.EVENT_TYPES.items():
+        unknown = set(event.get('blocks_production', ())) - resources
+        if unknown:
+            raise ValueError(f"Event {name} blocks unknown resources: {', '.join(sorted(unknown))}")
+    for name, building in C.BUILDINGS.items():
+        unknown = (set(building['cost']) | set(building.get('protects', {}))) - resources
+        if unknown:
+            raise ValueError(f"Building {name} refers to unknown resources: {', '.join(sorted(unknown))}")
+
+def scenario_from_constants():
+    """The scenario currently held in constants, in the file layout"""
+    return {
+        'tunables': {name: getattr(C, name) for name in dir(C)
+                     if name.isupper() and isinstance(getattr(C, name), TUNABLE_TYPES)
+                     and name not in ('SECONDS_PER_YEAR', 'SECONDS_PER_MONTH')},
+        'resources': list(C.RESOURCES),
+        'resource_colors': dict(C.RESOURCE_COLORS),
+        'cities': list(C.CITIES),
+        'events': dict(C.EVENT_TYPES),
+        'buildings': dict(C.BUILDINGS),
+    }
+
+def export_scenario(path):
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(path, 'w') as f:
+        json.dump(scenario_from_constants(), f, indent=2, ensure_ascii=False)
+
+TABLES = compile_tables()
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Check a scenario file, or export the built-in one")
+    parser.add_argument('path', help="scenario file to check (.json or .toml)")
+    parser.add_argument('--export', action='store_true', help="write the built-in scenario to PATH as JSON")
+    args = parser.parse_args()
+
+    if args.export:
+        export_scenario(args.path)
+        print(f"Wrote {args.path}")
+    else:
+        tables = apply_scenario(load_scenario(args.path))
+        print(f"{len(C.CITIES)} cities, {len(C.RESOURCES)} resources, "
+              f"{len(tables.event_names)} event types, {len(tables.building_names)} building types")
@@ -0,0 +1,153 @@
+import multiprocessing as mp
+import constants as C
+import scenario as S
+from game_engine import GameEngine
+
+def partition_regions(villages, num_regions):
+    """Split village indices into compact geographic regions by recursive median cuts"""
+    def split(indices, parts):
+        if parts <= 1 or len(indices) <= 1:
+            return [indices]
+        xs = [villages[i].position[0] for i in indices]
+        ys = [villages[i].position[1] for i in indices]
+        axis = 0 if max(xs) - min(xs) >= max(ys) - min(ys) else 1
+        ordered = sorted(indices, key=lambda i: (villages[i].position[axis], i))
+        left_parts = parts // 2
+        cut = len(ordered) * left_parts // parts
+        return split(sorted(ordered[:cut]), left_parts) + split(sorted(ordered[cut:]), parts - left_parts)
+
+    regions = split(list(range(len(villages))), num_regions)
+    return [region for region in regions if region]
+
+def _region_worker(conn, villages, tables):
+    """Worker loop: apply the coordinator's state sync, run the month for this region, report back"""
+    S.TABLES = tables
+    order = sorted(villages)
+    while True:
+        sync = conn.recv()
+        if sync is None:
+            break
+
+        for index, (resources, active_events, buildings) in sync.items():
+            villages[index].resources = resources
+            villages[index].active_events = active_events
+            villages[index].refresh_event_mask()
+            if buildings != villages[index].buildings:
+                villages[index].buildings = buildings
+                villages[index].refresh_building_mask()
+
+        results = []
+        for index in order:
+            village = villages[index]
+            if not village.is_alive:
+                continue
+
+            production = village.calculate_production()
+            consumption = village.calculate_consumption()
+
+            tax = 0
+            if not village.is_capital:
+                tax = production.get('gold', 0) * C.CAPITAL_TAX_RATE
+
+            village.update_month(production, consumption, tax)
+            # The coordinator keeps the histories
+            village.population_history.clear()
+            village.growth_history.clear()
+
+            results.append((index, tax, village.resources, village.population,
+                            village.growth_rate, village.is_alive, village.active_events))
+        conn.send(results)
+    conn.close()
+
+class ShardedEngine(GameEngine):
+    """GameEngine whose per-village month update runs in one worker process per region.
+
+    The coordinator keeps a mirror of every village. It owns the calendar, the
+    seeded events, trade planning and scoring, so results match GameEngine
+    exactly. At each month barrier a worker receives only the villages whose
+    stock, events or buildings changed since it last reported, for example
+    from cross-region trade deliveries, tax, pirates, new events or builds.
+
+    Trade matching is not split across regions: it needs every village's
+    surplus and deficit at once, so it runs on the coordinator after the
+    barrier, with the same allocator as GameEngine, and workers exchange
+    nothing with each other.
+    """
+    def __init__(self, seed=None, regions=None, allocator=None):
+        super().__init__(seed=seed, allocator=allocator)
+
+        num_regions = regions or mp.cpu_count()
+        self.regions = partition_regions(self.villages, num_regions)
+        self.region_of = {}
+        self.workers = []
+
+        for region_id, region in enumerate(self.regions):
+            parent_conn, child_conn = mp.Pipe()
+            process = mp.Process(
+                target=_region_worker,
+                args=(child_conn, {i: self.villages[i] for i in region}, S.TABLES),
+                name=f'region-{region_id}',
+                daemon=True
+            )
+            process.start()
+            child_conn.close()
+            self.workers.append((process, parent_conn))
+            for i in region:
+                self.region_of[i] = region_id
+
+        self.synced = [self._village_state(v) for v in self.villages]
+
+    def _village_state(self, village):
+        return (dict(village.resources), list(village.active_events), list(village.buildings))
+
+    def _update_villages(self):
+        syncs = [{} for _ in self.workers]
+        for i, village in enumerate(self.villages):
+            state = (village.resources, village.active_events, village.buildings)
+            if state != self.synced[i]:
+                syncs[self.region_of[i]][i] = self._village_state(village)
+
+        for (_, conn), sync in zip(self.workers, syncs):
+            conn.send(sync)
+
+        results = []
+        for _, conn in self.workers:
+            results.extend(conn.recv())
+        results.sort(key=lambda r: r[0])
+
+        capital = None
+        total_tax = 0
+        for index, tax, resources, population, growth_rate, is_alive, active_events in results:
+            village = self.villages[index]
+            village.resources = resources
+            village.population = population
+            village.growth_rate = growth_rate
+            village.is_alive = is_alive
+            village.active_events = active_events
+            village.refresh_event_mask()
+            village.population_history.append(population)
+            village.growth_history.append(growth_rate)
+            self.synced[index] = self._village_state(village)
+
+            if village.is_capital:
+                capital = village
+            else:
+                total_tax += tax
+
+        return capital, total_tax
+
+    def close(self):
+        for process, conn in self.workers:
+            try:
+                conn.send(None)
+                conn.close()
+            except (BrokenPipeError, OSError):
+                pass
+            process.join(timeout=5)
+        self.workers = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
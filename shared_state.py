@@ -0,0 +1,474 @@
+import itertools
+import multiprocessing as mp
+import sys
+import time
+from multiprocessing import shared_memory
+import constants as C
+import scenario as S
+from allocators import make_allocator
+from game_engine import GameEngine
+from trade_system import TradeCart
+from village import Village
+
+MAX_CARTS = 1024
+MAX_ACTIVE_EVENTS = 8
+# Engine process updates per second
+TICK_RATE = 120
+# Seconds a mirror village waits for the engine process to answer a build
+BUILD_TIMEOUT = 1.0
+
+# Header slots of the int64 array; slot 0 is the seqlock counter, odd while a write is in progress
+(_SEQ, _YEAR, _MONTH, _PAUSED, _COMPLETE, _SCORE, _TOTAL_TRADES, _TOTAL_DEATHS,
+ _SHIPMENTS, _CARTS_SENT, _DELIVERIES, _CART_COUNT) = range(12)
+HEADER_INTS = 12
+# Header slots of the float64 array
+_ELAPSED, _MONTH_TIMER, _LAST_MONTH_TIME = range(3)
+HEADER_FLOATS = 3
+
+class StateLayout:
+    """Fixed offsets of the shared block: an int64 array followed by a float64 array.
+
+    Per village the ints hold alive, population, event and building masks and
+    up to MAX_ACTIVE_EVENTS (event id, months left) pairs; the floats hold the
+    growth rate and one stock per resource. Per cart the ints hold a serial
+    number, both village indices and a bit per carried resource; the floats
+    hold position, elapsed time and the carried amounts.
+    """
+    def __init__(self, num_villages, num_resources=None, max_carts=MAX_CARTS):
+        self.num_villages = num_villages
+        self.num_resources = num_resources or len(C.RESOURCES)
+        self.max_carts = max_carts
+
+        self.village_ints = 5 + 2 * MAX_ACTIVE_EVENTS
+        self.village_floats = 1 + self.num_resources
+        self.cart_ints = 4
+        self.cart_floats = 3 + self.num_resources
+
+        self.cart_int_base = HEADER_INTS + num_villages * self.village_ints
+        self.cart_float_base = HEADER_FLOATS + num_villages * self.village_floats
+        self.num_ints = self.cart_int_base + max_carts * self.cart_ints
+        self.num_floats = self.cart_float_base + max_carts * self.cart_floats
+        self.size = 8 * (self.num_ints + self.num_floats)
+
+    def views(self, buf):
+        """(ints, floats) memoryviews straight over the shared buffer"""
+        split = 8 * self.num_ints
+        return buf[:split].cast('q'), buf[split:self.size].cast('d')
+
+class SharedStateWriter:
+    """Copies an engine's per-frame state into the shared block under the seqlock"""
+    def __init__(self, engine, layout, buf):
+        self.engine = engine
+        self.layout = layout
+        self.ints, self.floats = layout.views(buf)
+        self.serials = itertools.count(1)
+        self.village_index = {v.name: i for i, v in enumerate(engine.villages)}
+        self.dropped_carts = 0
+
+    def publish(self):
+        engine = self.engine
+        trade_system = engine.trade_system
+        layout = self.layout
+        ints = self.ints
+        floats = self.floats
+        tables = S.TABLES
+
+        ints[_SEQ] += 1
+        ints[_YEAR] = engine.current_year
+        ints[_MONTH] = engine.current_month
+        ints[_PAUSED] = engine.is_paused
+        ints[_COMPLETE] = engine.simulation_complete
+        ints[_SCORE] = engine.sustainability_score
+        ints[_TOTAL_TRADES] = engine.total_trades
+        ints[_TOTAL_DEATHS] = engine.total_deaths
+        ints[_SHIPMENTS] = trade_system.total_shipments
+        ints[_CARTS_SENT] = trade_system.total_carts
+        ints[_DELIVERIES] = trade_system.total_deliveries
+        floats[_ELAPSED] = engine.elapsed_time
+        floats[_MONTH_TIMER] = engine.month_timer
+        floats[_LAST_MONTH_TIME] = engine.last_month_time
+
+        for i, village in enumerate(engine.villages):
+            base = HEADER_INTS + i * layout.village_ints
+            events = village.active_events[:MAX_ACTIVE_EVENTS]
+            ints[base] = village.is_alive
+            ints[base + 1] = village.population
+            ints[base + 2] = village.event_mask
+            ints[base + 3] = village.building_mask
+            ints[base + 4] = len(events)
+            for k, (event_type, months_left) in enumerate(events):
+                ints[base + 5 + 2 * k] = tables.event_ids[event_type]
+                ints[base + 6 + 2 * k] = months_left
+
+            base = HEADER_FLOATS + i * layout.village_floats
+            floats[base] = village.growth_rate
+            for k, resource in enumerate(C.RESOURCES):
+                floats[base + 1 + k] = village.resources[resource]
+
+        carts = trade_system.active_carts[:layout.max_carts]
+        dropped = len(trade_system.active_carts) - len(carts)
+        if dropped > self.dropped_carts:
+            print(f"shared state: {dropped} carts beyond max_carts={layout.max_carts} are not mirrored",
+                  file=sys.stderr)
+        self.dropped_carts = dropped
+        for n, cart in enumerate(carts):
+            serial = getattr(cart, 'serial', 0)
+            if not serial:
+                serial = cart.serial = next(self.serials)
+            base = layout.cart_int_base + n * layout.cart_ints
+            ints[base] = serial
+            ints[base + 1] = self.village_index[cart.from_village]
+            ints[base + 2] = self.village_index[cart.to_village]
+
+            fbase = layout.cart_float_base + n * layout.cart_floats
+            floats[fbase] = cart.position[0]
+            floats[fbase + 1] = cart.position[1]
+            floats[fbase + 2] = cart.elapsed
+            bits = 0
+            for k, resource in enumerate(C.RESOURCES):
+                amount = cart.resources.get(resource)
+                if amount is not None:
+                    bits |= 1 << k
+                floats[fbase + 3 + k] = amount or 0.0
+            ints[base + 3] = bits
+        ints[_CART_COUNT] = len(carts)
+        ints[_SEQ] += 1
+
+    def close(self):
+        self.ints.release()
+        self.floats.release()
+
+class _ChangeFeed:
+    """Engine-side record of what the per-frame block can't carry: buildings, histories, event records and trades"""
+    def __init__(self, engine):
+        self.engine = engine
+        self.counts = [self._counts(v) for v in engine.villages]
+        self.record_count = len(engine.event_store)
+        self.trades = []
+        self.months = []
+        self.answers = []
+        self.village_index = {v.name: i for i, v in enumerate(engine.villages)}
+        engine.trade_system.trade_listeners.append(self.record_trade)
+        engine.month_listeners.append(self.record_month)
+
+    def _counts(self, village):
+        return (len(village.buildings), len(village.population_history), len(village.growth_history))
+
+    def record_trade(self, from_village, to_village, resource, amount, delivered):
+        self.trades.append((self.village_index[from_village.name], self.village_index[to_village.name],
+                            resource, amount, delivered))
+
+    def record_month(self, engine):
+        # Month listeners on the mirror must see the state as it was at the tick
+        rows = [(v.population, v.growth_rate, v.is_alive, dict(v.resources), list(v.active_events))
+                for v in engine.villages]
+        totals = (engine.current_year, engine.current_month, engine.sustainability_score,
+                  engine.total_trades, engine.total_deaths)
+        dispatched = [(cart.from_village, cart.to_village, dict(cart.resources))
+                      for cart in engine.trade_system.last_dispatched]
+        self.months.append((rows, totals, self.trades, dispatched))
+        self.trades = []
+
+    def collect(self):
+        """Changes since the last call, or None"""
+        villages = {}
+        for i, village in enumerate(self.engine.villages):
+            counts = self._counts(village)
+            old = self.counts[i]
+            if counts != old:
+                villages[i] = (village.buildings[old[0]:], village.population_history[old[1]:],
+                               village.growth_history[old[2]:])
+                self.counts[i] = counts
+
+        store = self.engine.event_store
+        events = None
+        if len(store) > self.record_count:
+            events = store.tail(self.record_count)
+            self.record_count = len(store)
+
+        if not villages and not events and not self.months and not self.answers:
+            return None
+        changes = {'villages': villages, 'events': events, 'months': self.months, 'answers': self.answers}
+        self.months = []
+        self.answers = []
+        return changes
+
+def _engine_process(conn, shm_name, layout, tables, seed, allocator_name, scenario_path):
+    """Run the simulation in real time, publishing each update and forwarding changes and commands"""
+    if scenario_path:
+        S.apply_scenario(S.load_scenario(scenario_path))
+    else:
+        S.TABLES = tables
+
+    shm = shared_memory.SharedMemory(name=shm_name)
+    engine = GameEngine(seed=seed, allocator=make_allocator(allocator_name))
+    writer = SharedStateWriter(engine, layout, shm.buf)
+    feed = _ChangeFeed(engine)
+    writer.publish()
+
+    tick = 1.0 / TICK_RATE
+    last = time.perf_counter()
+    running = True
+    while running:
+        while conn.poll():
+            command = conn.recv()
+            if command is None:
+                running = False
+                break
+            if command[0] == 'pause':
+                engine.toggle_pause()
+                feed.answers.append(('pause', command[1], engine.is_paused))
+            elif command[0] == 'build':
+                built = engine.villages[command[2]].build_structure(command[3])
+                feed.answers.append(('build', command[1], built))
+
+        now = time.perf_counter()
+        engine.update(now - last)
+        last = now
+        writer.publish()
+
+        changes = feed.collect()
+        if changes:
+            conn.send(changes)
+
+        remaining = tick - (time.perf_counter() - now)
+        if remaining > 0:
+            time.sleep(remaining)
+
+    writer.close()
+    shm.close()
+    conn.close()
+
+class VillageView(Village):
+    """Mirror village: builds are sent to the engine process rather than applied here"""
+    mirror = None
+    index = None
+
+    def build_structure(self, building_type):
+        """True once the engine process has built it, which the mirror then already shows"""
+        if not self.can_afford_building(building_type):
+            return False
+        return self.mirror.request_build(self.index, building_type)
+
+class EngineView(GameEngine):
+    """Renderer-side mirror of a GameEngine that runs in its own process.
+
+    The engine process writes its per-frame state into a shared memory block
+    under a seqlock: the writer makes the counter odd, writes, then makes it
+    even again, and update() re-reads until it sees the same even counter
+    before and after copying. Buildings, histories, event records and
+    trades, which have no fixed size, come over a pipe together with each
+    month's state, and month and trade listeners attached here run when that
+    arrives. Pause and build requests go back over the same pipe and are
+    answered with the changes of the tick that applied them: a build waits
+    for its answer, and is_paused only changes when the block does, with
+    pause_pending set in between.
+    """
+    village_class = VillageView
+
+    def __init__(self, seed=None, allocator_name='greedy', scenario_path=None, max_carts=MAX_CARTS):
+        super().__init__(seed=seed, allocator=make_allocator(allocator_name))
+        self.layout = StateLayout(len(self.villages), max_carts=max_carts)
+        self.shm = shared_memory.SharedMemory(create=True, size=self.layout.size)
+        self.ints, self.floats = self.layout.views(self.shm.buf)
+        self.last_seq = 0
+        self.village_rows = [None] * len(self.villages)
+        self.carts_by_serial = {}
+        self.requests = itertools.count(1)
+        self.answers = {}
+        self.pause_request = None
+        self.pause_pending = False
+
+        self.conn, child_conn = mp.Pipe()
+        for i, village in enumerate(self.villages):
+            village.index = i
+            village.mirror = self
+
+        self.process = mp.Process(
+            target=_engine_process,
+            args=(child_conn, self.shm.name, self.layout, S.TABLES, seed, allocator_name, scenario_path),
+            name='engine',
+            daemon=True
+        )
+        self._child_conn = child_conn
+
+    def start(self):
+        self.process.start()
+        self._child_conn.close()
+
+    def update(self, dt):
+        """Take in the engine process's changes and latest state; dt is unused, the engine keeps its own time"""
+        while self.conn.poll():
+            self._apply_changes(self.conn.recv())
+        self._read_block()
+
+    def toggle_pause(self):
+        """Ask the engine process to pause or resume; is_paused follows once the block shows it"""
+        self.pause_request = next(self.requests)
+        self.pause_pending = True
+        self.conn.send(('pause', self.pause_request))
+
+    def request_build(self, index, building_type):
+        """Send a build to the engine process and wait for its answer, applying changes meanwhile"""
+        request = next(self.requests)
+        self.conn.send(('build', request, index, building_type))
+        deadline = time.perf_counter() + BUILD_TIMEOUT
+        while request not in self.answers:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0 or not self.conn.poll(remaining):
+                # A late answer is still applied, and the building shows up when its changes arrive
+                print(f"shared state: no answer to building {building_type} after {BUILD_TIMEOUT}s",
+                      file=sys.stderr)
+                return False
+            self._apply_changes(self.conn.recv())
+        self._read_block()
+        return self.answers.pop(request)
+
+    def _read_block(self):
+        layout = self.layout
+        ints = self.ints
+        floats = self.floats
+        while True:
+            seq = ints[_SEQ]
+            if seq == self.last_seq:
+                return
+            if seq & 1:
+                continue
+            cart_count = ints[_CART_COUNT]
+            int_values = ints[:layout.cart_int_base + cart_count * layout.cart_ints].tolist()
+            float_values = floats[:layout.cart_float_base + cart_count * layout.cart_floats].tolist()
+            if ints[_SEQ] == seq:
+                break
+        self.last_seq = seq
+
+        self.current_year = int_values[_YEAR]
+        self.current_month = int_values[_MONTH]
+        self.is_paused = bool(int_values[_PAUSED])
+        self.simulation_complete = bool(int_values[_COMPLETE])
+        self.sustainability_score = int_values[_SCORE]
+        self.total_trades = int_values[_TOTAL_TRADES]
+        self.total_deaths = int_values[_TOTAL_DEATHS]
+        self.elapsed_time = float_values[_ELAPSED]
+        self.month_timer = float_values[_MONTH_TIMER]
+        self.last_month_time = float_values[_LAST_MONTH_TIME]
+        trade_system = self.trade_system
+        trade_system.total_shipments = int_values[_SHIPMENTS]
+        trade_system.total_carts = int_values[_CARTS_SENT]
+        trade_system.total_deliveries = int_values[_DELIVERIES]
+
+        event_names = S.TABLES.event_names
+        for i, village in enumerate(self.villages):
+            base = HEADER_INTS + i * layout.village_ints
+            fbase = HEADER_FLOATS + i * layout.village_floats
+            ints_row = int_values[base:base + 5 + 2 * int_values[base + 4]]
+            floats_row = float_values[fbase:fbase + layout.village_floats]
+            # Most ticks leave a village as it was; only a real change moves its version
+            if self.village_rows[i] == (ints_row, floats_row):
+                continue
+            self.village_rows[i] = (ints_row, floats_row)
+
+            village.is_alive = bool(ints_row[0])
+            village.population = ints_row[1]
+            village.event_mask = ints_row[2]
+            village.building_mask = ints_row[3]
+            village.active_events = [(event_names[ints_row[5 + 2 * k]], ints_row[6 + 2 * k])
+                                     for k in range(ints_row[4])]
+            village.growth_rate = floats_row[0]
+            for k, resource in enumerate(C.RESOURCES):
+                village.resources[resource] = floats_row[1 + k]
+            village.mark_changed()
+
+        carts = []
+        carts_by_serial = {}
+        for n in range(cart_count):
+            base = layout.cart_int_base + n * layout.cart_ints
+            fbase = layout.cart_float_base + n * layout.cart_floats
+            serial = int_values[base]
+            cart = self.carts_by_serial.get(serial)
+            if cart is None:
+                from_index, to_index, bits = int_values[base + 1:base + 4]
+                resources = {resource: float_values[fbase + 3 + k]
+                             for k, resource in enumerate(C.RESOURCES) if bits & (1 << k)}
+                origin, destination = self.villages[from_index], self.villages[to_index]
+                cart = TradeCart(origin.name, destination.name, resources, origin.position,
+                                 destination.position, self.routes.polyline(from_index, to_index))
+            cart.position[0] = float_values[fbase]
+            cart.position[1] = float_values[fbase + 1]
+            cart.elapsed = float_values[fbase + 2]
+            cart.progress = min(1.0, cart.elapsed / cart.duration)
+            carts.append(cart)
+            carts_by_serial[serial] = cart
+        trade_system.active_carts = carts
+        self.carts_by_serial = carts_by_serial
+
+    def _apply_changes(self, changes):
+        for kind, request, answer in changes['answers']:
+            if kind == 'build':
+                self.answers[request] = answer
+            elif request == self.pause_request:
+                self.pause_request = None
+                self.pause_pending = False
+        for i, (buildings, population_history, growth_history) in changes['villages'].items():
+            village = self.villages[i]
+            village.buildings.extend(buildings)
+            for building_type in buildings:
+                village.building_mask |= S.TABLES.building_bits[building_type]
+            village.population_history.extend(population_history)
+            village.growth_history.extend(growth_history)
+            village.mark_changed()
+        if changes['events']:
+            self.event_store.extend(changes['events'])
+
+        trade_system = self.trade_system
+        for rows, totals, trades, dispatched in changes['months']:
+            for village, (population, growth_rate, is_alive, resources, active_events) in zip(self.villages, rows):
+                village.population = population
+                village.growth_rate = growth_rate
+                village.is_alive = is_alive
+                village.resources = resources
+                village.active_events = active_events
+                village.refresh_event_mask()
+            (self.current_year, self.current_month, self.sustainability_score,
+             self.total_trades, self.total_deaths) = totals
+            self.sustainability_history.append(self.sustainability_score)
+
+            for from_index, to_index, resource, amount, delivered in trades:
+                for listener in trade_system.trade_listeners:
+                    listener(self.villages[from_index], self.villages[to_index], resource, amount, delivered)
+            villages_by_name = {v.name: v for v in self.villages}
+            trade_system.last_dispatched = [
+                TradeCart(from_name, to_name, resources,
+                          villages_by_name[from_name].position, villages_by_name[to_name].position)
+                for from_name, to_name, resources in dispatched
+            ]
+            for listener in self.month_listeners:
+                listener(self)
+
+    def close(self):
+        if self.process.is_alive():
+            try:
+                self.conn.send(None)
+            except (BrokenPipeError, OSError):
+                pass
+            # Keep draining so the engine process is never stuck sending
+            deadline = time.perf_counter() + 5
+            while self.process.is_alive() and time.perf_counter() < deadline:
+                if self.conn.poll(0.05):
+                    try:
+                        self.conn.recv()
+                    except EOFError:
+                        break
+            self.process.join(timeout=1)
+        self.conn.close()
+        if self.shm is not None:
+            self.ints.release()
+            self.floats.release()
+            self.shm.close()
+            self.shm.unlink()
+            self.shm = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,58 @@
+import math
+
+class SpatialGrid:
+    """Uniform grid over world positions for fast point and rectangle queries"""
+    def __init__(self, cell_size=64):
+        self.cell_size = cell_size
+        self.cells = {}
+
+    def _cell(self, x, y):
+        return (int(math.floor(x / self.cell_size)), int(math.floor(y / self.cell_size)))
+
+    def insert(self, item, x, y):
+        """Insert an item at a single world point"""
+        self.cells.setdefault(self._cell(x, y), []).append((item, x, y))
+
+    def insert_rect(self, item, x0, y0, x1, y1):
+        """Insert an item into every cell its bounding box overlaps"""
+        cx0, cy0 = self._cell(min(x0, x1), min(y0, y1))
+        cx1, cy1 = self._cell(max(x0, x1), max(y0, y1))
+        for cx in range(cx0, cx1 + 1):
+            for cy in range(cy0, cy1 + 1):
+                self.cells.setdefault((cx, cy), []).append((item, x0, y0))
+
+    def query_point(self, x, y, radius):
+        """Return the closest item within radius of (x, y), or None"""
+        cx0, cy0 = self._cell(x - radius, y - radius)
+        cx1, cy1 = self._cell(x + radius, y + radius)
+
+        best = None
+        best_dist_sq = radius * radius
+        for cx in range(cx0, cx1 + 1):
+            for cy in range(cy0, cy1 + 1):
+                for item, ix, iy in self.cells.get((cx, cy), ()):
+                    dist_sq = (ix - x) ** 2 + (iy - y) ** 2
+                    if dist_sq < best_dist_sq:
+                        best = item
+                        best_dist_sq = dist_sq
+        return best
+
+    def query_rect(self, x0, y0, x1, y1):
+        """Return the items in cells overlapping the rectangle, without duplicates"""
+        cx0, cy0 = self._cell(x0, y0)
+        cx1, cy1 = self._cell(x1, y1)
+
+        # When zoomed far out the rectangle spans more cells than exist
+        if (cx1 - cx0 + 1) * (cy1 - cy0 + 1) > len(self.cells):
+            keys = [k for k in self.cells if cx0 <= k[0] <= cx1 and cy0 <= k[1] <= cy1]
+        else:
+            keys = [(cx, cy) for cx in range(cx0, cx1 + 1) for cy in range(cy0, cy1 + 1)]
+
+        found = []
+        seen = set()
+        for key in keys:
+            for item, _, _ in self.cells.get(key, ()):
+                if id(item) not in seen:
+                    seen.add(id(item))
+                    found.append(item)
+        return found
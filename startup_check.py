@@ -0,0 +1,41 @@
+import subprocess
+import sys
+
+CORE_MODULES = ['constants', 'village', 'trade_system', 'events', 'game_engine', 'headless']
+CORE_IMPORT_BUDGET_MS = 50
+
+_PROBE = """
+import sys, time
+start = time.perf_counter()
+import {modules}
+elapsed = (time.perf_counter() - start) * 1000
+print(elapsed, 'pygame' in sys.modules)
+"""
+
+def measure_core_startup(runs=5):
+    """Import the simulation core in fresh interpreters; return (best import ms, pygame loaded)"""
+    probe = _PROBE.format(modules=', '.join(CORE_MODULES))
+    best = None
+    pygame_loaded = False
+    for _ in range(runs):
+        out = subprocess.run([sys.executable, '-c', probe], capture_output=True, text=True, check=True)
+        elapsed, loaded = out.stdout.split()
+        elapsed = float(elapsed)
+        best = elapsed if best is None else min(best, elapsed)
+        pygame_loaded = pygame_loaded or loaded == 'True'
+    return best, pygame_loaded
+
+def main():
+    elapsed, pygame_loaded = measure_core_startup()
+    print(f"Core import: {elapsed:.1f} ms (budget {CORE_IMPORT_BUDGET_MS} ms)")
+
+    if pygame_loaded:
+        print("FAIL: importing the simulation core pulled in pygame")
+        sys.exit(1)
+    if elapsed > CORE_IMPORT_BUDGET_MS:
+        print("FAIL: core import is over budget")
+        sys.exit(1)
+    print("OK")
+
+if __name__ == "__main__":
+    main()
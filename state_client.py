@@ -0,0 +1,58 @@
+import argparse
+import asyncio
+import json
+from state_server import DEFAULT_PORT
+
+class StateMirror:
+    """Client-side copy of the streamed state, rebuilt from keyframes and deltas"""
+    def __init__(self):
+        self.state = None
+
+    def apply(self, message):
+        if message['type'] == 'keyframe':
+            self.state = message['state']
+            return
+        if self.state is None:
+            return
+
+        for key in ('month', 'time', 'score', 'total_trades'):
+            self.state[key] = message[key]
+        for index, changes in message['villages'].items():
+            village = self.state['villages'][int(index)]
+            village['resources'].update(changes.pop('resources', {}))
+            village.update(changes)
+
+async def watch(host, port, months=None):
+    reader, writer = await asyncio.open_connection(host, port)
+    mirror = StateMirror()
+    received = 0
+    try:
+        while months is None or received < months:
+            line = await reader.readline()
+            if not line:
+                break
+            message = json.loads(line)
+            mirror.apply(message)
+
+            state = mirror.state
+            alive = sum(1 for v in state['villages'] if v['alive'])
+            if message['type'] == 'keyframe':
+                print(f"[keyframe] {state['time']}: {alive} cities alive, score {state['score']}")
+            else:
+                received += 1
+                events = ', '.join(f"{e[2]} in {'/'.join(e[3])}" for e in message['events'])
+                print(f"{state['time']}: score {state['score']}, {len(message['villages'])} cities changed, "
+                      f"{len(message['carts'])} new carts{', ' + events if events else ''}")
+    finally:
+        writer.close()
+
+def main():
+    parser = argparse.ArgumentParser(description="Watch a running simulation's state stream")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT)
+    parser.add_argument('--months', type=int, default=None, help="stop after this many month updates")
+    args = parser.parse_args()
+    asyncio.run(watch(args.host, args.port, args.months))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,164 @@
+import asyncio
+import json
+import threading
+import constants as C
+
+DEFAULT_PORT = 8765
+CLIENT_QUEUE_SIZE = 32
+
+_KEYFRAME = object()
+
+def snapshot(engine):
+    """Plain, JSON-ready copy of the state viewers care about"""
+    return {
+        'month': (engine.current_year - C.SIMULATION_START_YEAR) * 12 + engine.current_month,
+        'time': engine.get_time_string(),
+        'score': engine.sustainability_score,
+        'total_trades': engine.total_trades,
+        'villages': [
+            {
+                'name': v.name,
+                'resources': {res: round(amount, 1) for res, amount in v.resources.items()},
+                'population': v.population,
+                'alive': v.is_alive,
+                'events': [event_type for event_type, _ in v.active_events],
+                'buildings': list(v.buildings),
+            }
+            for v in engine.villages
+        ],
+    }
+
+def diff(old, new):
+    """Per-village fields that changed between two snapshots, keyed by village index"""
+    changes = {}
+    for i, (before, after) in enumerate(zip(old['villages'], new['villages'])):
+        changed = {}
+        resources = {res: amount for res, amount in after['resources'].items()
+                     if before['resources'].get(res) != amount}
+        if resources:
+            changed['resources'] = resources
+        for field in ('population', 'alive', 'events', 'buildings'):
+            if before[field] != after[field]:
+                changed[field] = after[field]
+        if changed:
+            changes[str(i)] = changed
+    return changes
+
+def _encode(message):
+    return (json.dumps(message, separators=(',', ':')) + '\n').encode()
+
+class _Client:
+    def __init__(self, writer):
+        self.writer = writer
+        self.queue = asyncio.Queue(maxsize=CLIENT_QUEUE_SIZE)
+        self.sent_month = -1
+
+class StateServer:
+    """Streams month-by-month state deltas to TCP viewers as newline-delimited JSON.
+
+    The engine thread only snapshots state and hands it to the server's event
+    loop; encoding and sending happen on the server thread. Each client has a
+    bounded queue. A client that falls behind has its backlog dropped and gets
+    a fresh keyframe, so a slow viewer never stalls the simulation or other
+    viewers.
+    """
+    def __init__(self, host='127.0.0.1', port=DEFAULT_PORT):
+        self.host = host
+        self.port = port
+        self.clients = set()
+        self.latest = None
+        self.event_count = 0
+
+        self.loop = asyncio.new_event_loop()
+        self.ready = threading.Event()
+        # Why the server thread could not start listening, raised again by start()
+        self.error = None
+        self.thread = threading.Thread(target=self._run, name='state-server', daemon=True)
+
+    def start(self):
+        """Start listening; attach() an engine first so new clients have a keyframe.
+
+        Raises the server thread's error (e.g. OSError when the port is taken).
+        """
+        self.thread.start()
+        self.ready.wait()
+        if self.error is not None:
+            raise self.error
+        return self
+
+    def attach(self, engine):
+        self.latest = snapshot(engine)
+        self.event_count = len(engine.event_system.event_history)
+        engine.month_listeners.append(self.publish)
+
+    def publish(self, engine):
+        """Month listener, runs on the engine thread"""
+        state = snapshot(engine)
+        history = engine.event_system.event_history
+        events = [list(entry) for entry in history[self.event_count:]]
+        self.event_count = len(history)
+        carts = [[cart.from_village, cart.to_village,
+                  {res: round(amount, 1) for res, amount in cart.resources.items()}]
+                 for cart in engine.trade_system.last_dispatched]
+        self.loop.call_soon_threadsafe(self._broadcast, state, carts, events)
+
+    def _broadcast(self, state, carts, events):
+        previous = self.latest
+        self.latest = state
+        message = _encode({
+            'type': 'delta',
+            'month': state['month'],
+            'time': state['time'],
+            'score': state['score'],
+            'total_trades': state['total_trades'],
+            'villages': diff(previous, state),
+            'carts': carts,
+            'events': events,
+        })
+
+        for client in self.clients:
+            try:
+                client.queue.put_nowait((state['month'], message))
+            except asyncio.QueueFull:
+                while not client.queue.empty():
+                    client.queue.get_nowait()
+                client.queue.put_nowait((state['month'], _KEYFRAME))
+
+    async def _handle_client(self, reader, writer):
+        client = _Client(writer)
+        self.clients.add(client)
+        try:
+            await self._send_keyframe(client)
+            while True:
+                month, message = await client.queue.get()
+                if message is _KEYFRAME:
+                    await self._send_keyframe(client)
+                elif month > client.sent_month:
+                    writer.write(message)
+                    client.sent_month = month
+                    await writer.drain()
+        except (ConnectionError, asyncio.CancelledError):
+            pass
+        finally:
+            self.clients.discard(client)
+            writer.close()
+
+    async def _send_keyframe(self, client):
+        state = self.latest
+        client.writer.write(_encode({'type': 'keyframe', 'month': state['month'], 'state': state}))
+        client.sent_month = state['month']
+        await client.writer.drain()
+
+    def _run(self):
+        asyncio.set_event_loop(self.loop)
+        try:
+            server = self.loop.run_until_complete(
+                asyncio.start_server(self._handle_client, self.host, self.port))
+            self.port = server.sockets[0].getsockname()[1]
+        except Exception as exc:
+            self.error = exc
+            self.loop.close()
+            return
+        finally:
+            self.ready.set()
+        self.loop.run_forever()
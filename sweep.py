@@ -0,0 +1,154 @@
+import argparse
+import csv
+import hashlib
+import itertools
+import json
+import os
+import random
+import sys
+from concurrent.futures import ProcessPoolExecutor
+import constants as C
+from headless import run_simulation
+
+SWEEPABLE = [
+    'CAPITAL_TAX_RATE',
+    'TRADE_EFFICIENCY',
+    'EVENT_BASE_CHANCE',
+    'BASE_PRODUCTION',
+    'PRODUCTION_PER_CAPITA',
+    'CONSUMPTION_PER_CAPITA',
+    'MINIMUM_SURVIVAL_BASE',
+    'MINIMUM_SURVIVAL_PER_CAPITA',
+    'GROWTH_THRESHOLD_BASE',
+    'GROWTH_THRESHOLD_PER_CAPITA',
+    'MAX_GROWTH_RATE',
+    'MAX_DECLINE_RATE',
+]
+
+CORE_SOURCES = ['constants.py', 'scenario.py', 'village.py', 'trade_system.py', 'allocators.py', 'routing.py',
+                'events.py', 'event_store.py', 'game_engine.py', 'headless.py']
+DEFAULT_CACHE_DIR = '.sweep_cache'
+
+_DEFAULTS = {name: getattr(C, name) for name in SWEEPABLE}
+
+def code_version():
+    """Hash of the simulation sources, so cached results expire when the engine changes"""
+    digest = hashlib.sha256()
+    base = os.path.dirname(os.path.abspath(__file__))
+    for filename in CORE_SOURCES:
+        with open(os.path.join(base, filename), 'rb') as f:
+            digest.update(f.read())
+    return digest.hexdigest()[:16]
+
+def cache_key(params, seed, version):
+    payload = json.dumps({'params': params, 'seed': seed, 'version': version}, sort_keys=True)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+def grid_points(grid):
+    """Cartesian product of {name: [values]} as a list of parameter dicts"""
+    names = sorted(grid)
+    return [dict(zip(names, values)) for values in itertools.product(*(grid[n] for n in names))]
+
+def random_points(ranges, count, seed=0):
+    """Uniform random sample of {name: (low, high)} as a list of parameter dicts"""
+    rng = random.Random(seed)
+    names = sorted(ranges)
+    return [{n: rng.uniform(*ranges[n]) for n in names} for _ in range(count)]
+
+def _run_point(params, seed):
+    # Pool workers are reused, so reset every tunable before applying this point
+    for name, value in _DEFAULTS.items():
+        setattr(C, name, value)
+    for name, value in params.items():
+        setattr(C, name, value)
+    return run_simulation(seed=seed)
+
+def run_sweep(points, seeds, workers=None, cache_dir=DEFAULT_CACHE_DIR):
+    """Run every (point, seed) pair, reading finished pairs from the on-disk cache.
+
+    Returns (results, computed) where results is a list of (params, seed, summary).
+    """
+    for params in points:
+        unknown = set(params) - set(SWEEPABLE)
+        if unknown:
+            raise ValueError(f"Not a sweepable parameter: {', '.join(sorted(unknown))}")
+
+    os.makedirs(cache_dir, exist_ok=True)
+    version = code_version()
+
+    results = {}
+    missing = []
+    for i, params in enumerate(points):
+        for seed in seeds:
+            path = os.path.join(cache_dir, cache_key(params, seed, version) + '.json')
+            if os.path.exists(path):
+                with open(path) as f:
+                    results[(i, seed)] = json.load(f)
+            else:
+                missing.append((i, seed, path))
+
+    if missing:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = [(i, seed, path, pool.submit(_run_point, points[i], seed)) for i, seed, path in missing]
+            for i, seed, path, future in futures:
+                summary = future.result()
+                tmp_path = path + '.tmp'
+                with open(tmp_path, 'w') as f:
+                    json.dump(summary, f)
+                os.replace(tmp_path, path)
+                results[(i, seed)] = summary
+
+    ordered = [(params, seed, results[(i, seed)]) for i, params in enumerate(points) for seed in seeds]
+    return ordered, len(missing)
+
+def _parse_seeds(text):
+    if '-' in text:
+        start, end = text.split('-')
+        return list(range(int(start), int(end) + 1))
+    return [int(s) for s in text.split(',')]
+
+def main():
+    parser = argparse.ArgumentParser(description="Parameter sweep over headless simulations")
+    parser.add_argument('--grid', action='append', default=[], metavar='NAME=V1,V2,...')
+    parser.add_argument('--range', action='append', default=[], metavar='NAME=LOW:HIGH')
+    parser.add_argument('--samples', type=int, default=20, help="random points drawn from --range")
+    parser.add_argument('--sample-seed', type=int, default=0)
+    parser.add_argument('--seeds', default='0-4', help="e.g. 0-9 or 1,5,7")
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--cache-dir', default=DEFAULT_CACHE_DIR)
+    parser.add_argument('--out', default=None, help="CSV output path (default stdout)")
+    args = parser.parse_args()
+
+    if args.grid and args.range:
+        parser.error("use either --grid or --range, not both")
+
+    if args.range:
+        ranges = {}
+        for spec in args.range:
+            name, bounds = spec.split('=')
+            low, high = bounds.split(':')
+            ranges[name] = (float(low), float(high))
+        points = random_points(ranges, args.samples, args.sample_seed)
+    else:
+        grid = {}
+        for spec in args.grid:
+            name, values = spec.split('=')
+            grid[name] = [float(v) for v in values.split(',')]
+        points = grid_points(grid)
+
+    seeds = _parse_seeds(args.seeds)
+    results, computed = run_sweep(points, seeds, args.workers, args.cache_dir)
+    print(f"{len(results)} runs, {computed} computed, {len(results) - computed} from cache", file=sys.stderr)
+
+    param_names = sorted(points[0]) if points else []
+    summary_names = list(results[0][2]) if results else []
+    out = open(args.out, 'w', newline='') if args.out else sys.stdout
+    writer = csv.writer(out)
+    writer.writerow(param_names + summary_names)
+    for params, seed, summary in results:
+        writer.writerow([params[n] for n in param_names] + [summary[n] for n in summary_names])
+    if args.out:
+        out.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,37 @@
+import math
+from types import SimpleNamespace
+from routing import RouteGraph
+
+def make_graph(positions, roads):
+    """RouteGraph over stand-in villages named by their index"""
+    villages = [SimpleNamespace(name=str(i), position=pos, connected_routes=[]) for i, pos in enumerate(positions)]
+    for a, b in roads:
+        villages[a].connected_routes.append(str(b))
+    return RouteGraph(villages)
+
+def test_reopening_city_off_every_shortest_path_keeps_tree():
+    # 0-1-2 along a line, with 3 on a long detour between 0 and 2
+    routes = make_graph([(0, 0), (10, 0), (20, 0), (10, 50)], [(0, 1), (1, 2), (0, 3), (3, 2)])
+    routes.set_blocked([3])
+    tree = routes._tree(0)
+    routes.set_blocked([])
+    assert routes.trees.get(0) is tree
+    assert routes.distance(0, 2) == 20.0
+
+def test_reopening_city_on_a_shorter_path_drops_tree():
+    # 0-2 direct is longer than 0-1-2
+    routes = make_graph([(0, 0), (10, 1), (20, 0), (10, 40)], [(0, 1), (1, 2), (0, 3), (3, 2)])
+    routes.set_blocked([1])
+    routes._tree(0)
+    assert routes.distance(0, 2) > 80
+    routes.set_blocked([])
+    assert 0 not in routes.trees
+    assert math.isclose(routes.distance(0, 2), 2 * math.hypot(10, 1))
+
+def test_reopening_city_to_an_unreachable_neighbour_drops_tree():
+    routes = make_graph([(0, 0), (10, 0), (20, 0)], [(0, 1), (1, 2)])
+    routes.set_blocked([1])
+    assert math.isinf(routes.distance(0, 2))
+    routes.set_blocked([])
+    assert 0 not in routes.trees
+    assert routes.distance(0, 2) == 20.0
@@ -0,0 +1,193 @@
+import argparse
+import os
+import struct
+import time
+import zlib
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+# Offscreen rendering: set before pygame is first imported
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+
+import pygame
+import constants as C
+import scenario
+from allocators import ALLOCATORS, make_allocator
+from game_engine import GameEngine
+from headless import step_month
+from replay import ReplayReader
+from trade_system import TradeCart
+from ui_renderer import UIRenderer
+
+BASE_HEIGHT = 900
+ASSET_TIMEOUT = 10.0
+PNG_LEVEL = 3
+
+def encode_png(path, width, height, rgb):
+    """Write raw RGB bytes as a PNG; runs in the pool, so it only needs zlib"""
+    stride = width * 3
+    # Filter type 0 on every row: zlib does the work, and it stays in C
+    raw = b''.join(b'\x00' + rgb[y * stride:(y + 1) * stride] for y in range(height))
+
+    def chunk(kind, data):
+        return struct.pack('>I', len(data)) + kind + data + struct.pack('>I', zlib.crc32(kind + data))
+
+    header = struct.pack('>IIBBBBB', width, height, 8, 2, 0, 0, 0)
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(b'\x89PNG\r\n\x1a\n')
+        f.write(chunk(b'IHDR', header))
+        f.write(chunk(b'IDAT', zlib.compress(raw, PNG_LEVEL)))
+        f.write(chunk(b'IEND', b''))
+    os.replace(tmp_path, path)
+    return path
+
+def seeded_months(engine, months=None):
+    """Step a seeded engine exactly as headless runs do; yields the carts sent each month"""
+    stepped = 0
+    while not engine.simulation_complete and (months is None or stepped < months):
+        step_month(engine)
+        stepped += 1
+        yield engine.trade_system.last_dispatched
+
+def replay_months(engine, reader, months=None):
+    """Load each recorded month of a replay into a display engine; yields the carts sent that month"""
+    tables = scenario.TABLES
+    names = {v.name: i for i, v in enumerate(engine.villages)}
+    last = reader.last_month if months is None else min(reader.last_month, reader.first_month + months - 1)
+    for month in range(reader.first_month, last + 1):
+        frame = reader.frame_at(month)
+        engine.current_year = C.SIMULATION_START_YEAR + (frame.month - 1) // 12
+        engine.current_month = (frame.month - 1) % 12 + 1
+        engine.sustainability_score = frame.score
+        engine.total_trades = frame.total_trades
+        engine.simulation_complete = month == reader.last_month and engine.current_year >= C.SIMULATION_END_YEAR
+
+        for i, row in enumerate(frame.rows):
+            if row is None:
+                continue
+            _, population, alive, building_mask, event_mask, growth, *resources = row
+            village = engine.villages[i]
+            village.population = population
+            village.is_alive = bool(alive)
+            village.growth_rate = growth
+            village.resources = dict(zip(C.RESOURCES, resources))
+            village.building_mask = building_mask
+            village.buildings = [b for b in tables.building_names if building_mask & tables.building_bits[b]]
+            village.event_mask = event_mask
+            village.active_events = [(e, 0) for e in tables.event_names if event_mask & tables.event_bits[e]]
+            village.mark_changed()
+
+        carts = []
+        for source, target, resources in frame.carts:
+            origin, destination = engine.villages[names[source]], engine.villages[names[target]]
+            carts.append(TradeCart(source, target, resources, origin.position, destination.position,
+                                   engine.routes.polyline(names[source], names[target])))
+        yield carts
+
+def _wait_for_assets(renderer):
+    """Render once so city art is requested, then wait until every image has arrived"""
+    renderer.render()
+    deadline = time.perf_counter() + ASSET_TIMEOUT
+    while renderer.asset_loader.pending() and time.perf_counter() < deadline:
+        time.sleep(0.01)
+        renderer._poll_assets()
+    renderer._poll_assets()
+
+def export(engine, months, out_dir, size, frames_per_month, workers=None):
+    """Render frames_per_month map frames per month into out_dir, encoding them on a process pool.
+
+    Each month's carts are drawn part way along their roads, so they travel
+    across the month's frames. Frames left in out_dir by an earlier, longer
+    export are deleted first. Returns the number of frames written.
+    """
+    width, height = size
+    os.makedirs(out_dir, exist_ok=True)
+    # ffmpeg's frame_%06d.png pattern would otherwise run on into the old frames
+    for name in os.listdir(out_dir):
+        if name.startswith('frame_') and name.endswith('.png'):
+            os.remove(os.path.join(out_dir, name))
+    pygame.init()
+    screen = pygame.display.set_mode(size)
+    renderer = UIRenderer(screen, engine, replay_path=None)
+    # Same framing as the 1600x900 window, scaled to the output height
+    scale = height / BASE_HEIGHT
+    renderer.zoom *= scale
+    renderer.camera_x *= scale
+    renderer.camera_y *= scale
+    _wait_for_assets(renderer)
+
+    trade_system = engine.trade_system
+    count = 0
+    in_flight = deque()
+    workers = workers or os.cpu_count() or 1
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        limit = 2 * workers
+        for dispatched in months:
+            resting = trade_system.active_carts
+            for k in range(frames_per_month):
+                progress = (k + 0.5) / frames_per_month
+                carts = []
+                for cart in dispatched:
+                    shown = cart.fork()
+                    shown.elapsed = 0.0
+                    shown.update(progress * shown.duration)
+                    carts.append(shown)
+                trade_system.active_carts = carts
+                renderer.render()
+
+                path = os.path.join(out_dir, f'frame_{count:06d}.png')
+                rgb = pygame.image.tobytes(screen, 'RGB')
+                in_flight.append(pool.submit(encode_png, path, width, height, rgb))
+                count += 1
+                # Keep rendering ahead of the encoders, but only so far
+                while len(in_flight) >= limit:
+                    in_flight.popleft().result()
+            trade_system.active_carts = resting
+
+        while in_flight:
+            in_flight.popleft().result()
+    pygame.quit()
+    return count
+
+def _parse_size(text):
+    width, height = text.lower().split('x')
+    return int(width), int(height)
+
+def main():
+    parser = argparse.ArgumentParser(description="Export a timelapse of a run as PNG frames, rendered offscreen")
+    parser.add_argument('--seed', type=int, default=None, help="simulate this seed (ignored with --replay)")
+    parser.add_argument('--replay', default=None, metavar='PATH', help="render a recorded replay instead")
+    parser.add_argument('--out', default='timelapse', metavar='DIR')
+    parser.add_argument('--size', type=_parse_size, default=(1920, 1080), metavar='WxH')
+    parser.add_argument('--frames-per-month', type=int, default=4)
+    parser.add_argument('--months', type=int, default=None, help="stop after this many months")
+    parser.add_argument('--workers', type=int, default=None, help="PNG encoder processes")
+    parser.add_argument('--scenario', default=None, metavar='PATH',
+                        help="load cities, buildings, events and tunables from a .json or .toml file")
+    parser.add_argument('--allocator', choices=sorted(ALLOCATORS), default='greedy',
+                        help="how each month's surpluses are matched to deficits")
+    args = parser.parse_args()
+
+    if args.scenario:
+        scenario.apply_scenario(scenario.load_scenario(args.scenario))
+
+    if args.replay:
+        engine = GameEngine()
+        months = replay_months(engine, ReplayReader(args.replay), args.months)
+    else:
+        engine = GameEngine(seed=args.seed, allocator=make_allocator(args.allocator))
+        months = seeded_months(engine, args.months)
+
+    started = time.perf_counter()
+    count = export(engine, months, args.out, args.size, args.frames_per_month, args.workers)
+    elapsed = time.perf_counter() - started
+    print(f"Wrote {count} frames to {args.out} in {elapsed:.1f}s "
+          f"({C.REAL_TIME_DURATION / max(elapsed, 1e-9):.1f}x real time)" if not args.months else
+          f"Wrote {count} frames to {args.out} in {elapsed:.1f}s")
+    print(f"Encode with: ffmpeg -framerate {args.frames_per_month * 12} -i {args.out}/frame_%06d.png "
+          f"-pix_fmt yuv420p timelapse.mp4")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,171 @@
+import bisect
+import csv
+import struct
+from array import array
+import constants as C
+
+CHUNK_SIZE = 4096
+MAGIC = b'WKTL'
+VERSION = 2
+
+COLUMNS = [
+    ('month', 'I'),
+    ('source', 'H'),
+    ('destination', 'H'),
+    ('resource', 'B'),
+    ('sent', 'd'),
+    ('delivered', 'd'),
+]
+
+_HEADER = struct.Struct('<4sHQHH')      # magic, version, rows, village count, resource count
+_NAME = struct.Struct('<H')
+_COLUMN = struct.Struct('<16sc')        # column name, array typecode
+
+class TradeLedger:
+    """Every trade of a run in typed column arrays that grow a chunk at a time.
+
+    Rows are appended in month order, so time windows are found by bisecting
+    the month column. Resource codes index the ledger's own resources list,
+    which is saved with it, so a ledger reads the same under any scenario.
+    """
+    def __init__(self, names=(), resources=None):
+        self.names = list(names)
+        self.resources = list(C.RESOURCES if resources is None else resources)
+        self.resource_ids = {res: i for i, res in enumerate(self.resources)}
+        self.size = 0
+        self.capacity = 0
+        self.columns = {name: array(typecode) for name, typecode in COLUMNS}
+        self.engine = None
+
+    def attach(self, engine):
+        self.names = [v.name for v in engine.villages]
+        self.index = {name: i for i, name in enumerate(self.names)}
+        self.engine = engine
+        engine.trade_system.trade_listeners.append(self.record_trade)
+
+    def record_trade(self, from_village, to_village, resource, amount, delivered):
+        engine = self.engine
+        month = (engine.current_year - C.SIMULATION_START_YEAR) * 12 + engine.current_month
+        self.append(month, self.index[from_village.name], self.index[to_village.name],
+                    self.resource_ids[resource], amount, delivered)
+
+    def append(self, month, source, destination, resource, sent, delivered):
+        if self.size == self.capacity:
+            self._grow()
+        i = self.size
+        columns = self.columns
+        columns['month'][i] = month
+        columns['source'][i] = source
+        columns['destination'][i] = destination
+        columns['resource'][i] = resource
+        columns['sent'][i] = sent
+        columns['delivered'][i] = delivered
+        self.size += 1
+
+    def _grow(self):
+        for name, typecode in COLUMNS:
+            self.columns[name].extend(array(typecode, bytes(CHUNK_SIZE * array(typecode).itemsize)))
+        self.capacity += CHUNK_SIZE
+
+    def __len__(self):
+        return self.size
+
+    def column(self, name):
+        """Zero-copy view of the filled part of a column"""
+        return memoryview(self.columns[name])[:self.size]
+
+    def rows(self, source=None, destination=None, resource=None, start_month=None, end_month=None):
+        """Row numbers matching every given filter; months are inclusive"""
+        months = self.columns['month']
+        lo = 0 if start_month is None else bisect.bisect_left(months, start_month, 0, self.size)
+        hi = self.size if end_month is None else bisect.bisect_right(months, end_month, 0, self.size)
+
+        if isinstance(resource, str):
+            resource = self.resource_ids[resource]
+        if isinstance(source, str):
+            source = self.names.index(source)
+        if isinstance(destination, str):
+            destination = self.names.index(destination)
+
+        sources = self.columns['source']
+        destinations = self.columns['destination']
+        resources = self.columns['resource']
+        return [i for i in range(lo, hi)
+                if (source is None or sources[i] == source)
+                and (destination is None or destinations[i] == destination)
+                and (resource is None or resources[i] == resource)]
+
+    def total(self, value='delivered', **filters):
+        values = self.columns[value]
+        return sum(values[i] for i in self.rows(**filters))
+
+    def aggregate(self, by, value='delivered', **filters):
+        """Sum a value column grouped by 'route', 'source', 'destination', 'resource' or 'month'"""
+        values = self.columns[value]
+        if by == 'route':
+            sources = self.columns['source']
+            destinations = self.columns['destination']
+            key = lambda i: (self.names[sources[i]], self.names[destinations[i]])
+        elif by == 'resource':
+            resources = self.columns['resource']
+            key = lambda i: self.resources[resources[i]]
+        elif by in ('source', 'destination'):
+            column = self.columns[by]
+            key = lambda i: self.names[column[i]]
+        elif by == 'month':
+            months = self.columns['month']
+            key = lambda i: months[i]
+        else:
+            raise ValueError(f"Cannot aggregate by {by!r}")
+
+        totals = {}
+        for i in self.rows(**filters):
+            k = key(i)
+            totals[k] = totals.get(k, 0.0) + values[i]
+        return totals
+
+    def to_csv(self, path):
+        with open(path, 'w', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow([name for name, _ in COLUMNS])
+            columns = self.columns
+            for i in range(self.size):
+                writer.writerow([
+                    columns['month'][i],
+                    self.names[columns['source'][i]],
+                    self.names[columns['destination'][i]],
+                    self.resources[columns['resource'][i]],
+                    columns['sent'][i],
+                    columns['delivered'][i],
+                ])
+
+    def save(self, path):
+        """Write a columnar file: header, city and resource names, then each column's raw bytes"""
+        with open(path, 'wb') as f:
+            f.write(_HEADER.pack(MAGIC, VERSION, self.size, len(self.names), len(self.resources)))
+            for name in self.names + self.resources:
+                encoded = name.encode()
+                f.write(_NAME.pack(len(encoded)) + encoded)
+            for name, typecode in COLUMNS:
+                f.write(_COLUMN.pack(name.encode(), typecode.encode()))
+                f.write(self.column(name).tobytes())
+
+    @classmethod
+    def load(cls, path):
+        with open(path, 'rb') as f:
+            magic, version, size, count, num_resources = _HEADER.unpack(f.read(_HEADER.size))
+            if magic != MAGIC or version != VERSION:
+                raise ValueError(f"{path} is not a version {VERSION} trade ledger")
+            names = []
+            for _ in range(count + num_resources):
+                (length,) = _NAME.unpack(f.read(_NAME.size))
+                names.append(f.read(length).decode())
+
+            ledger = cls(names[:count], names[count:])
+            for _ in COLUMNS:
+                raw_name, typecode = _COLUMN.unpack(f.read(_COLUMN.size))
+                column = array(typecode.decode())
+                column.frombytes(f.read(size * column.itemsize))
+                ledger.columns[raw_name.rstrip(b'\0').decode()] = column
+            ledger.size = ledger.capacity = size
+        return ledger
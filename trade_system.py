@@ -1,20 +1,29 @@
 
 import math
 import constants as C
+import scenario as S
+from routing import point_along
+from allocators import GreedyAllocator
 
 class TradeCart:
-    def __init__(self, from_village, to_village, resources, start_pos, end_pos):
+    def __init__(self, from_village, to_village, resources, start_pos, end_pos, path=None):
         self.from_village = from_village
         self.to_village = to_village
         self.resources = resources
+        # (sequence number, resource, amount) per shipment carried, in dispatch order
+        self.shipments = [(0, resource, amount) for resource, amount in resources.items()]
         self.position = list(start_pos) 
         self.start_pos = start_pos
         self.end_pos = end_pos
         self.progress = 0.0
         
-        dx = end_pos[0] - start_pos[0]
-        dy = end_pos[1] - start_pos[1]
-        self.distance = math.sqrt(dx*dx + dy*dy)
+        # path is (points, cumulative arc lengths) along the roads; default is a straight line
+        if path is None:
+            dx = end_pos[0] - start_pos[0]
+            dy = end_pos[1] - start_pos[1]
+            path = ([start_pos, end_pos], [0.0, math.sqrt(dx*dx + dy*dy)])
+        self.path_points, self.path_lengths = path
+        self.distance = self.path_lengths[-1]
         self.duration = C.SECONDS_PER_MONTH 
         self.elapsed = 0.0
     
@@ -22,102 +31,122 @@ class TradeCart:
         self.elapsed += dt
         self.progress = min(1.0, self.elapsed / self.duration)
         
-        self.position[0] = self.start_pos[0] + (self.end_pos[0] - self.start_pos[0]) * self.progress
-        self.position[1] = self.start_pos[1] + (self.end_pos[1] - self.start_pos[1]) * self.progress
+        x, y = point_along(self.path_points, self.path_lengths, self.distance * self.progress)
+        self.position[0] = x
+        self.position[1] = y
         
         return self.progress >= 1.0  
 
+    def fork(self):
+        clone = TradeCart.__new__(TradeCart)
+        clone.__dict__.update(self.__dict__)
+        clone.resources = dict(self.resources)
+        clone.shipments = list(self.shipments)
+        clone.position = list(self.position)
+        return clone
+
 class TradeSystem:
-    def __init__(self, villages):
+    def __init__(self, villages, routes, allocator=None):
         self.villages = villages
+        self.routes = routes
+        self.allocator = allocator or GreedyAllocator()
+        self.village_index = {v.name: i for i, v in enumerate(villages)}
         self.active_carts = []
-    
-    def calculate_trades(self):
-        trades = [] 
         
-        alive_villages = [v for v in self.villages if v.is_alive]
+        self.last_shipments = 0
+        self.last_carts = 0
+        self.last_dispatched = []
         
-        for resource in C.RESOURCES:
-            surpluses = [] 
-            deficits = []   
+        # Callables run as listener(from_village, to_village, resource, amount_sent, amount_delivered)
+        self.trade_listeners = []
+        self.total_shipments = 0
+        self.total_carts = 0
+        self.total_deliveries = 0
+    
+    def fork(self, villages):
+        """Copy of the in-flight carts, delivering into the given (forked) villages"""
+        clone = TradeSystem(villages, self.routes.fork(), self.allocator.fork())
+        clone.active_carts = [cart.fork() for cart in self.active_carts]
+        clone.total_shipments = self.total_shipments
+        clone.total_carts = self.total_carts
+        clone.total_deliveries = self.total_deliveries
+        return clone
+    
+    def calculate_trades(self):
+        # Per resource, unblocked suppliers {index: surplus} and deficits {index: (amount, key)},
+        # with deficit keys (-urgency, index) sorted most urgent first
+        suppliers = {res: {} for res in C.RESOURCES}
+        deficits = {res: {} for res in C.RESOURCES}
+        blocked = []
+        trade_block_mask = S.TABLES.trade_block_mask
+        for i, village in enumerate(self.villages):
+            if not village.is_alive:
+                continue
+            if village.event_mask & trade_block_mask:
+                blocked.append(i)
+                continue
             
-            for village in alive_villages:
-                survival_threshold, growth_threshold = village.calculate_thresholds()
+            growth_threshold = village.calculate_thresholds()[1]
+            for resource in C.RESOURCES:
                 current = village.resources[resource]
-                
-                can_receive = not (
-                    village.has_event_type('plague') or
-                    village.has_event_type('lightning')
-                )
-                
                 if current > growth_threshold:
-                    surplus = current - growth_threshold
-                    surpluses.append((village, surplus))
-                
-                elif current < growth_threshold and can_receive:
+                    suppliers[resource][i] = current - growth_threshold
+                elif current < growth_threshold:
                     deficit = 2*growth_threshold - current
-                    
-                    if current < growth_threshold:
-                        urgency = 1000/(growth_threshold/(growth_threshold - current))
-                    else:
-                        urgency = deficit / growth_threshold
-                    
-                    deficits.append((village, deficit, urgency))
-            
-            deficits.sort(key=lambda x: x[2], reverse=True)
-            
-            for deficit_village, deficit_amount, urgency in deficits:
-                needed = deficit_amount
-                
-                surplus_distances = []
-                for surplus_village, surplus_amount in surpluses:
-                    if surplus_amount > 0:
-                        dx = surplus_village.position[0] - deficit_village.position[0]
-                        dy = surplus_village.position[1] - deficit_village.position[1]
-                        distance = math.sqrt(dx*dx + dy*dy)
-                        
-                        route_blocked = (
-                            surplus_village.has_event_type('lightning') or
-                            surplus_village.has_event_type('plague')
-                        )
-                        
-                        if not route_blocked:
-                            surplus_distances.append((surplus_village, surplus_amount, distance))
-                
-                surplus_distances.sort(key=lambda x: x[2])
-                
-                for surplus_village, surplus_amount, distance in surplus_distances:
-                    if needed <= 0:
-                        break
-                    
-                    send_amount = min(needed, surplus_amount) 
-                    
-                    if send_amount > 5:  
-                        trades.append((surplus_village, deficit_village, resource, send_amount))
-                        
-                        for i, (v, amt) in enumerate(surpluses):
-                            if v == surplus_village:
-                                surpluses[i] = (v, amt - send_amount)
-                                break
-                        
-                        needed -= send_amount
+                    urgency = 1000/(growth_threshold/(growth_threshold - current))
+                    deficits[resource][i] = (deficit, (-urgency, i))
+        
+        # Blocked cities also close the roads through them
+        self.routes.set_blocked(blocked)
+        
+        trades = []
+        villages = self.villages
+        for resource in C.RESOURCES:
+            order = sorted(key for _, key in deficits[resource].values())
+            shipments = self.allocator.allocate(resource, suppliers[resource], deficits[resource],
+                                                order, self.routes.distance)
+            for supplier_index, deficit_index, amount in shipments:
+                trades.append((villages[supplier_index], villages[deficit_index], resource, amount))
         
         return trades
     
     def execute_trades(self, trades):
-        for from_village, to_village, resource, amount in trades:
+        # All shipments between the same pair this month travel in one multi-resource cart
+        carts = {}
+        for seq, (from_village, to_village, resource, amount) in enumerate(trades, self.total_shipments):
             from_village.resources[resource] -= amount
+            from_village.mark_changed()
             
             actual_amount = amount * C.TRADE_EFFICIENCY
             
-            cart = TradeCart(
-                from_village.name,
-                to_village.name,
-                {resource: actual_amount},
-                from_village.position,
-                to_village.position
-            )
-            self.active_carts.append(cart)
+            for listener in self.trade_listeners:
+                listener(from_village, to_village, resource, amount, actual_amount)
+            
+            key = (from_village.name, to_village.name)
+            cart = carts.get(key)
+            if cart is None:
+                cart = TradeCart(
+                    from_village.name,
+                    to_village.name,
+                    {},
+                    from_village.position,
+                    to_village.position,
+                    self.routes.polyline(self.village_index[from_village.name], self.village_index[to_village.name])
+                )
+                carts[key] = cart
+                self.active_carts.append(cart)
+            cart.resources[resource] = cart.resources.get(resource, 0) + actual_amount
+            cart.shipments.append((seq, resource, actual_amount))
+        
+        self.last_dispatched = list(carts.values())
+        self.last_shipments = len(trades)
+        self.last_carts = len(carts)
+        self.total_shipments += len(trades)
+        self.total_carts += len(carts)
+    
+    def carts_saved(self):
+        """Carts avoided by consolidating shipments, over the whole run"""
+        return self.total_shipments - self.total_carts
     
     def update(self, dt):
         completed = []
@@ -126,11 +155,20 @@ class TradeSystem:
             if cart.update(dt):
                 completed.append(cart)
         
+        if not completed:
+            return
+        
+        villages_by_name = {village.name: village for village in self.villages}
+        deliveries = []
         for cart in completed:
-            for village in self.villages:
-                if village.name == cart.to_village:
-                    for resource, amount in cart.resources.items():
-                        village.resources[resource] += amount
-                    break
-            
-            self.active_carts.remove(cart)
\ No newline at end of file
+            village = villages_by_name.get(cart.to_village)
+            if village:
+                deliveries.extend((seq, village, resource, amount) for seq, resource, amount in cart.shipments)
+        # Add shipments in dispatch order, so stocks sum exactly as they would one cart per shipment
+        deliveries.sort(key=lambda delivery: delivery[0])
+        for _, village, resource, amount in deliveries:
+            village.resources[resource] += amount
+            village.mark_changed()
+        self.total_deliveries += len(completed)
+        
+        self.active_carts = [cart for cart in self.active_carts if cart.progress < 1.0]
\ No newline at end of file
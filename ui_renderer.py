@@ -1,11 +1,28 @@
 import pygame
-import math
 import constants as C
+from spatial_index import SpatialGrid
+from asset_loader import AssetLoader
+from forecast import Forecaster
+from replay import ReplayReader
+from perf_hud import PerfHUD
+
+ASSET_PATH = 'assets/'
+
+CITY_HIT_RADIUS = 20
+CULL_MARGIN_PX = 160
+SUMMARY_TABS = ['Summary', 'Resource Flow', 'Population', 'Decisions']
 
 class UIRenderer:
-    def __init__(self, screen, engine):
+    def __init__(self, screen, engine, replay_path=None, analytics=None):
         self.screen = screen
         self.engine = engine
+        self.analytics = analytics
+        self.summary_tab = 0
+        self.flow_resource = None
+        self.replay_path = replay_path
+        self.replay = None
+        self.replay_month = None
+        self.scrubbing = False
         self.width = screen.get_width()
         self.height = screen.get_height()
         
@@ -29,39 +46,71 @@ class UIRenderer:
         
         self._load_assets()
         
+        self.city_index = SpatialGrid()
+        self.village_order = {}
+        for i, village in enumerate(self.engine.villages):
+            self.city_index.insert(village, village.position[0], village.position[1])
+            self.village_order[id(village)] = i
+        
+        self.route_index = SpatialGrid()
+        villages_by_name = {v.name: v for v in self.engine.villages}
+        seen_routes = set()
+        for village in self.engine.villages:
+            for connected_name in village.connected_routes:
+                other = villages_by_name.get(connected_name)
+                key = frozenset((village.name, connected_name))
+                if other is None or key in seen_routes:
+                    continue
+                seen_routes.add(key)
+                self.route_index.insert_rect((village, other),
+                                             village.position[0], village.position[1],
+                                             other.position[0], other.position[1])
+        
+        self.hovered_village = None
+        
         self.building_menu_open = False
         self.hovered_building = None
+        
+        # The city page is composed here and only redrawn when its key changes
+        self.detail_surface = screen.copy()
+        self.detail_key = None
+        
+        self.forecaster = Forecaster()
+        
+        self.hud = PerfHUD(engine, pygame.font.Font(None, 22))
     
     def _load_assets(self):
         self.assets = {}
-        asset_path = 'assets/'
+        self.map_bg = None
+        self.asset_loader = AssetLoader()
         
         for resource in C.RESOURCES:
-            try:
-                img = pygame.image.load(f'{asset_path}{resource}_icon.png')
-                self.assets[f'{resource}_icon'] = pygame.transform.scale(img, (32, 32))
-            except:
-                surf = pygame.Surface((32, 32), pygame.SRCALPHA)
-                pygame.draw.circle(surf, C.RESOURCE_COLORS[resource], (16, 16), 14)
-                self.assets[f'{resource}_icon'] = surf
-        
-        for city_data in C.CITIES:
-            city_key = city_data['name']
-            try:
-                if not asset_path.endswith('/'):
-                    asset_path += '/'
-
-                img = pygame.image.load(f'{asset_path}{city_key}.png')
-                self.assets[f'city_{city_key}'] = img
-            except:
-                pass
+            surf = pygame.Surface((32, 32), pygame.SRCALPHA)
+            pygame.draw.circle(surf, C.RESOURCE_COLORS[resource], (16, 16), 14)
+            self.assets[f'{resource}_icon'] = surf
+            self.asset_loader.request(f'{resource}_icon', f'{ASSET_PATH}{resource}_icon.png', (32, 32))
         
-        try:
-            self.map_bg = pygame.image.load(f'{asset_path}windsor_essex_map.png')
-        except:
-            self.map_bg = None
+        self.asset_loader.request('map_bg', f'{ASSET_PATH}windsor_essex_map.png')
+    
+    def _request_city_image(self, city_key):
+        # City art is pre-scaled to its largest on-screen size so per-frame scaling stays cheap
+        max_size = int(50 * self.max_zoom)
+        self.asset_loader.request(f'city_{city_key}', f'{ASSET_PATH}{city_key}.png', (max_size, max_size))
+    
+    def _poll_assets(self):
+        for key, img in self.asset_loader.poll():
+            if img is None:
+                continue
+            if key == 'map_bg':
+                self.map_bg = img
+            else:
+                self.assets[key] = img
     
     def handle_event(self, event):
+        if event.type == pygame.KEYDOWN and event.key == pygame.K_F3:
+            self.hud.toggle()
+            return
+        
         if self.view_mode == 'map':
             self._handle_map_event(event)
         elif self.view_mode == 'city_detail':
@@ -112,6 +161,8 @@ class UIRenderer:
                 self.camera_x += dx
                 self.camera_y += dy
                 self.drag_start = event.pos
+            else:
+                self.hovered_village = self._get_city_at_pos(event.pos)
         
         elif event.type == pygame.KEYDOWN:
             if event.key == pygame.K_SPACE:
@@ -119,60 +170,139 @@ class UIRenderer:
             elif event.key == pygame.K_ESCAPE:
                 if self.engine.simulation_complete:
                     self.view_mode = 'end_summary'
+                    self._open_replay()
+    
+    def _get_building_at_pos(self, pos):
+        building_y_start = 175
+        for i, building_type in enumerate(C.BUILDINGS):
+            button_rect = pygame.Rect(1150, building_y_start + i * 90, 380, 70)
+            if button_rect.collidepoint(pos):
+                return building_type
+        return None
     
     def _handle_city_detail_event(self, event):
         if event.type == pygame.MOUSEBUTTONDOWN:
             if event.button == 1 and self.selected_village:
-                building_y_start = 175
-                for i, (building_type, building_data) in enumerate(C.BUILDINGS.items()):
-                    button_rect = pygame.Rect(1150, building_y_start + i * 90, 380, 70)
-                    if button_rect.collidepoint(event.pos):
-                        if self.selected_village.can_afford_building(building_type):
-                            success = self.selected_village.build_structure(building_type)
-                            if success:
-                                print(f"Built {building_data['name']} in {self.selected_village.name}")
-                        else:
-                            print(f"Cannot afford {building_data['name']}")
+                building_type = self._get_building_at_pos(event.pos)
+                if building_type:
+                    building_data = C.BUILDINGS[building_type]
+                    if self.selected_village.can_afford_building(building_type):
+                        success = self.selected_village.build_structure(building_type)
+                        if success:
+                            print(f"Built {building_data['name']} in {self.selected_village.name}")
+                    else:
+                        print(f"Cannot afford {building_data['name']}")
+        
+        elif event.type == pygame.MOUSEMOTION:
+            self.hovered_building = self._get_building_at_pos(event.pos)
         
         elif event.type == pygame.KEYDOWN:
             if event.key == pygame.K_ESCAPE or event.key == pygame.K_BACKSPACE:
                 self.view_mode = 'map'
     
     def _handle_end_summary_event(self, event):
+        scrubbable = self.replay is not None and self.summary_tab == 0
+        
         if event.type == pygame.KEYDOWN:
             if event.key == pygame.K_ESCAPE:
                 self.view_mode = 'map'
+            elif self.analytics and event.key == pygame.K_TAB:
+                self.summary_tab = (self.summary_tab + 1) % len(SUMMARY_TABS)
+            elif self.analytics and pygame.K_1 <= event.key < pygame.K_1 + len(SUMMARY_TABS):
+                self.summary_tab = event.key - pygame.K_1
+            elif self.summary_tab == 1 and event.key == pygame.K_r:
+                options = [None] + C.RESOURCES
+                self.flow_resource = options[(options.index(self.flow_resource) + 1) % len(options)]
+            elif scrubbable and event.key in (pygame.K_LEFT, pygame.K_RIGHT):
+                step = 12 if event.mod & pygame.KMOD_SHIFT else 1
+                if event.key == pygame.K_LEFT:
+                    step = -step
+                self._set_replay_month(self.replay_month + step)
+            elif scrubbable and event.key == pygame.K_HOME:
+                self._set_replay_month(self.replay.first_month)
+            elif scrubbable and event.key == pygame.K_END:
+                self._set_replay_month(self.replay.last_month)
+        
+        elif event.type == pygame.MOUSEBUTTONDOWN and event.button == 1 and scrubbable:
+            if self._get_timeline_rect().inflate(0, 20).collidepoint(event.pos):
+                self.scrubbing = True
+                self._scrub_to(event.pos[0])
+        
+        elif event.type == pygame.MOUSEMOTION and self.scrubbing:
+            self._scrub_to(event.pos[0])
+        
+        elif event.type == pygame.MOUSEBUTTONUP and event.button == 1:
+            self.scrubbing = False
+    
+    def _open_replay(self):
+        if not self.replay_path:
+            return
+        try:
+            if self.replay is None:
+                self.replay = ReplayReader(self.replay_path)
+            else:
+                self.replay.refresh()
+        except (OSError, ValueError) as e:
+            print(f"Replay unavailable: {e}")
+            self.replay = None
+            return
+        self.replay_month = self.replay.last_month
+    
+    def _get_timeline_rect(self):
+        return pygame.Rect(80, self.height - 82, self.width - 160, 12)
+    
+    def _set_replay_month(self, month):
+        self.replay_month = max(self.replay.first_month, min(self.replay.last_month, month))
+    
+    def _scrub_to(self, x):
+        rect = self._get_timeline_rect()
+        fraction = max(0.0, min(1.0, (x - rect.x) / rect.width))
+        span = self.replay.last_month - self.replay.first_month
+        self._set_replay_month(self.replay.first_month + round(fraction * span))
     
     def _get_city_at_pos(self, pos):
-        for village in self.engine.villages:
-            screen_x = village.position[0] * self.zoom + self.camera_x
-            screen_y = village.position[1] * self.zoom + self.camera_y
-            
-            dist = math.sqrt((pos[0] - screen_x)**2 + (pos[1] - screen_y)**2)
-            
-            radius = 20 * self.zoom
-            if dist < radius:
-                return village
-        
-        return None
+        # The hit radius scales with zoom, so it is constant in world space
+        world_x, world_y = self.screen_to_world(pos[0], pos[1])
+        return self.city_index.query_point(world_x, world_y, CITY_HIT_RADIUS)
     
     def world_to_screen(self, world_x, world_y):
         screen_x = world_x * self.zoom + self.camera_x
         screen_y = world_y * self.zoom + self.camera_y
         return (screen_x, screen_y)
     
+    def screen_to_world(self, screen_x, screen_y):
+        world_x = (screen_x - self.camera_x) / self.zoom
+        world_y = (screen_y - self.camera_y) / self.zoom
+        return (world_x, world_y)
+    
+    def _get_view_rect(self):
+        """World-space rectangle visible on screen, padded for labels and icons"""
+        margin = CULL_MARGIN_PX / self.zoom
+        x0, y0 = self.screen_to_world(0, 0)
+        x1, y1 = self.screen_to_world(self.width, self.height)
+        return (x0 - margin, y0 - margin, x1 + margin, y1 + margin)
+    
     def render(self):
+        self._poll_assets()
+        
         if self.view_mode == 'map':
             self._render_map_view()
-        elif self.view_mode == 'city_detail':
-            self._render_city_detail()
-        elif self.view_mode == 'end_summary':
-            self._render_end_summary()
+        else:
+            started = self.hud.clock()
+            if self.view_mode == 'city_detail':
+                self._render_city_detail()
+            elif self.view_mode == 'end_summary':
+                self._render_end_summary()
+            self.hud.lap('page', started)
         
         if self.engine.simulation_complete and self.view_mode == 'map':
             self._render_completion_message()
+        
+        self.hud.render(self.screen)
     
     def _render_map_view(self):
+        hud = self.hud
+        started = hud.clock()
         self.screen.fill(C.COLOR_BG)
         
         if self.map_bg:
@@ -181,31 +311,40 @@ class UIRenderer:
             scaled_bg = pygame.transform.scale(self.map_bg, (bg_width, bg_height))
             self.screen.blit(scaled_bg, (self.camera_x, self.camera_y))
         
-        self._render_trade_routes()
-        self._render_trade_carts()
-        self._render_cities()
+        started = hud.lap('background', started)
+        
+        view_rect = self._get_view_rect()
+        self._render_trade_routes(view_rect)
+        started = hud.lap('routes', started)
+        self._render_trade_carts(view_rect)
+        started = hud.lap('carts', started)
+        self._render_cities(view_rect)
+        started = hud.lap('cities', started)
         self._render_ui_overlay()
+        hud.lap('overlay', started)
     
-    def _render_trade_routes(self):
-        for village in self.engine.villages:
-            if not village.is_alive:
+    def _render_trade_routes(self, view_rect):
+        line_width = max(1, int(2 * self.zoom))
+        
+        for village, other in self.route_index.query_rect(*view_rect):
+            if not village.is_alive or not other.is_alive:
                 continue
             
-            for connected_name in village.connected_routes:
-                for other in self.engine.villages:
-                    if other.name == connected_name and other.is_alive:
-                        color = C.COLOR_ROUTE
-                        if village.has_event_type('lightning') or other.has_event_type('lightning'):
-                            color = (200, 200, 200)
-                        
-                        start_pos = self.world_to_screen(village.position[0], village.position[1])
-                        end_pos = self.world_to_screen(other.position[0], other.position[1])
-                        
-                        pygame.draw.line(self.screen, color, start_pos, end_pos, max(1, int(2 * self.zoom)))
-                        break
-    
-    def _render_trade_carts(self):
-        for cart in self.engine.trade_system.active_carts:
+            color = C.COLOR_ROUTE
+            if village.has_event_type('lightning') or other.has_event_type('lightning'):
+                color = (200, 200, 200)
+            
+            start_pos = self.world_to_screen(village.position[0], village.position[1])
+            end_pos = self.world_to_screen(other.position[0], other.position[1])
+            
+            pygame.draw.line(self.screen, color, start_pos, end_pos, line_width)
+    
+    def _render_trade_carts(self, view_rect):
+        x0, y0, x1, y1 = view_rect
+        visible_carts = [cart for cart in self.engine.trade_system.active_carts
+                         if x0 <= cart.position[0] <= x1 and y0 <= cart.position[1] <= y1]
+        
+        for cart in visible_carts:
             screen_pos = self.world_to_screen(cart.position[0], cart.position[1])
             
             radius = max(4, int(6 * self.zoom))
@@ -220,8 +359,11 @@ class UIRenderer:
                     icon_pos = (screen_pos[0] - icon_size//2, screen_pos[1] - icon_size - 10)
                     self.screen.blit(icon_small, icon_pos)
 
-    def _render_cities(self):
-        for village in self.engine.villages:
+    def _render_cities(self, view_rect):
+        visible = self.city_index.query_rect(*view_rect)
+        visible.sort(key=lambda v: self.village_order[id(v)])
+        
+        for village in visible:
             screen_pos = self.world_to_screen(village.position[0], village.position[1])
             
             if not village.is_alive:
@@ -237,8 +379,13 @@ class UIRenderer:
                 self.screen.blit(dead_text, (screen_pos[0] - 15, screen_pos[1] - 40))
                 continue
             
+            if village is self.hovered_village:
+                pygame.draw.circle(self.screen, (255, 255, 255), screen_pos, int(CITY_HIT_RADIUS * 1.6 * self.zoom), 2)
+            
             city_key = village.name
             city_image = self.assets.get(f'city_{city_key}')
+            if city_image is None:
+                self._request_city_image(city_key)
             
             if city_image:
                 img_size = int(50 * self.zoom)
@@ -365,6 +512,7 @@ class UIRenderer:
             f"Cities: {alive_cities}/{len(self.engine.villages)}",
             f"Pop: {total_pop:,}",
             f"Carts: {len(self.engine.trade_system.active_carts)}",
+            f"Carts saved: {self.engine.trade_system.carts_saved()}",
             f"Trades: {self.engine.total_trades}",
         ]
         
@@ -377,7 +525,7 @@ class UIRenderer:
             pause_rect = pause_text.get_rect(center=(self.width // 2, 50))
             self.screen.blit(pause_text, pause_rect)
         
-        hint_text = self.font_tiny.render("SPACE: Pause | Drag: Pan | Scroll: Zoom | Click City: Details", True, (200, 200, 200))
+        hint_text = self.font_tiny.render("SPACE: Pause | Drag: Pan | Scroll: Zoom | Click City: Details | F3: Perf", True, (200, 200, 200))
         self.screen.blit(hint_text, (self.width - 550, self.height - 25))
     
     def _render_city_detail(self):
@@ -386,7 +534,23 @@ class UIRenderer:
             return
         
         village = self.selected_village
-        
+        engine = self.engine
+        # Everything on the page comes from the village, whose version moves with any change
+        key = (engine.villages.index(village), village.version, len(self.assets))
+        if key != self.detail_key:
+            screen = self.screen
+            self.screen = self.detail_surface
+            try:
+                self._compose_city_detail(village)
+            finally:
+                self.screen = screen
+            self.detail_key = key
+        
+        self.screen.blit(self.detail_surface, (0, 0))
+        self._render_building_hover(1150, 130, village)
+        self._render_forecast_panel(750, 560, 380, 150, village)
+    
+    def _compose_city_detail(self, village):
         self.screen.fill(C.COLOR_BG)
         
         title_text = self.font_large.render(village.name, True, C.COLOR_TEXT)
@@ -506,6 +670,74 @@ class UIRenderer:
         for point in points:
             pygame.draw.circle(self.screen, color, (int(point[0]), int(point[1])), 3)
     
+    def _render_forecast_panel(self, x, y, width, height, village):
+        building_type = self.hovered_building
+        if building_type in village.buildings:
+            building_type = None
+        
+        village_index = self.engine.villages.index(village)
+        key = (village_index, building_type, self.engine.current_year, self.engine.current_month, len(village.buildings))
+        if village.is_alive and not self.engine.simulation_complete:
+            self.forecaster.request(key, self.engine, village_index, building_type)
+        projection = self.forecaster.result(key)
+        
+        months = self.forecaster.months
+        if building_type:
+            title = f"Next {months} mo: +{C.BUILDINGS[building_type]['name']}"
+        else:
+            title = f"Next {months} mo: no change"
+        
+        pop_series = []
+        res_series = []
+        if projection:
+            pop_series.append((projection['baseline']['population'], (150, 150, 150)))
+            shown = projection['baseline']
+            if projection['scenario']:
+                pop_series.append((projection['scenario']['population'], (100, 100, 200)))
+                shown = projection['scenario']
+            res_series = [(shown['resources'][res], C.RESOURCE_COLORS[res]) for res in C.RESOURCES]
+        
+        self._render_forecast_chart(x, y, width, height, f"Population - {title}", pop_series)
+        self._render_forecast_chart(x, y + height + 10, width, height, "Projected Resources", res_series)
+    
+    def _render_forecast_chart(self, x, y, width, height, title, series):
+        chart_rect = pygame.Rect(x, y, width, height)
+        pygame.draw.rect(self.screen, (240, 240, 240), chart_rect)
+        pygame.draw.rect(self.screen, C.COLOR_TEXT, chart_rect, 2)
+        
+        title_text = self.font_tiny.render(title, True, C.COLOR_TEXT)
+        self.screen.blit(title_text, (x + 10, y + 8))
+        
+        if not series:
+            waiting_text = self.font_tiny.render("Forecasting...", True, (150, 150, 150))
+            self.screen.blit(waiting_text, (x + width // 2 - 40, y + height // 2))
+            return
+        
+        min_val = min(min(data) for data, _ in series)
+        max_val = max(max(data) for data, _ in series)
+        range_val = max_val - min_val if max_val != min_val else 1
+        
+        y_axis_x = x + 40
+        graph_width = width - 50
+        graph_height = height - 45
+        
+        min_label = self.font_tiny.render(f"{int(min_val)}", True, C.COLOR_TEXT)
+        self.screen.blit(min_label, (x + 5, y + height - 25))
+        max_label = self.font_tiny.render(f"{int(max_val)}", True, C.COLOR_TEXT)
+        self.screen.blit(max_label, (x + 5, y + 28))
+        
+        pygame.draw.line(self.screen, (150, 150, 150), (y_axis_x, y + 28), (y_axis_x, y + height - 15), 1)
+        pygame.draw.line(self.screen, (150, 150, 150), (y_axis_x, y + height - 15), (x + width - 10, y + height - 15), 1)
+        
+        for data, color in series:
+            points = []
+            for i, val in enumerate(data):
+                px = y_axis_x + (i / max(len(data) - 1, 1)) * graph_width
+                py = y + height - 15 - ((val - min_val) / range_val) * graph_height
+                points.append((px, py))
+            if len(points) > 1:
+                pygame.draw.lines(self.screen, color, False, points, 2)
+    
     def _render_building_menu(self, x, y, village):
         menu_label = self.font_medium.render("Build Projects", True, C.COLOR_TEXT)
         self.screen.blit(menu_label, (x, y))
@@ -547,6 +779,15 @@ class UIRenderer:
             
             button_y += 90
     
+    def _render_building_hover(self, x, y, village):
+        building_type = self.hovered_building
+        if not building_type or building_type in village.buildings:
+            return
+        i = list(C.BUILDINGS).index(building_type)
+        button_rect = pygame.Rect(x, y + 45 + i * 90, 350, 70)
+        color = (0, 0, 100) if village.can_afford_building(building_type) else (100, 0, 0)
+        pygame.draw.rect(self.screen, color, button_rect, 4)
+    
     def _render_end_summary(self):
         self.screen.fill(C.COLOR_BG)
         
@@ -554,19 +795,46 @@ class UIRenderer:
         title_rect = title_text.get_rect(center=(self.width // 2, 40))
         self.screen.blit(title_text, title_rect)
         
-        alive_cities = [v for v in self.engine.villages if v.is_alive]
-        total_pop = sum(v.population for v in alive_cities)
+        if self.analytics:
+            self._render_summary_tabs()
+            if self.summary_tab == 1:
+                self._render_flow_report()
+            elif self.summary_tab == 2:
+                self._render_population_report()
+            elif self.summary_tab == 3:
+                self._render_decisions_report()
+            if self.summary_tab != 0:
+                hint_text = self.font_medium.render("Press ESC to return to map", True, (100, 100, 100))
+                hint_rect = hint_text.get_rect(center=(self.width // 2, self.height - 40))
+                self.screen.blit(hint_text, hint_rect)
+                return
+        
+        frame = self.replay.frame_at(self.replay_month) if self.replay else None
+        
+        if frame:
+            cities = [frame.village(i) for i in range(len(frame.names))]
+            period = f"Replay: {frame.time_string()}"
+            total_trades = frame.total_trades
+            score = frame.score
+        else:
+            cities = [{'name': v.name, 'alive': v.is_alive, 'population': v.population} for v in self.engine.villages]
+            period = f"Simulation Period: {C.SIMULATION_START_YEAR} - {C.SIMULATION_END_YEAR}"
+            total_trades = self.engine.total_trades
+            score = self.engine.sustainability_score
+        
+        alive_cities = [v for v in cities if v['alive']]
+        total_pop = sum(v['population'] for v in alive_cities)
         
         stats_y = 120
         stats = [
-            f"Simulation Period: {C.SIMULATION_START_YEAR} - {C.SIMULATION_END_YEAR}",
+            period,
             f"",
-            f"Final Cities Alive: {len(alive_cities)} / {len(self.engine.villages)}",
+            f"Cities Alive: {len(alive_cities)} / {len(cities)}",
             f"Total Population: {total_pop:,}",
-            f"Total Trades Completed: {self.engine.total_trades}",
+            f"Total Trades Completed: {total_trades}",
             f"Total Events: {len(self.engine.event_system.event_history)}",
             f"",
-            f"Final Sustainability Score: {self.engine.sustainability_score} / 1000",
+            f"Sustainability Score: {score} / 1000",
         ]
         
         for i, stat in enumerate(stats):
@@ -578,22 +846,161 @@ class UIRenderer:
         breakdown_label = self.font_medium.render("City Status:", True, C.COLOR_TEXT)
         self.screen.blit(breakdown_label, (80, breakdown_y))
         
-        for i, village in enumerate(self.engine.villages):
+        for i, village in enumerate(cities):
             city_y = breakdown_y + 40 + i * 28
-            status = "ALIVE" if village.is_alive else "DESTROYED"
-            status_color = (0, 150, 0) if village.is_alive else (150, 0, 0)
+            status = "ALIVE" if village['alive'] else "DESTROYED"
+            status_color = (0, 150, 0) if village['alive'] else (150, 0, 0)
             
-            city_text = self.font_small.render(f"{village.name}: {status}", True, status_color)
+            city_text = self.font_small.render(f"{village['name']}: {status}", True, status_color)
             self.screen.blit(city_text, (80, city_y))
             
-            if village.is_alive:
-                pop_text = self.font_small.render(f"Population: {village.population:,}", True, C.COLOR_TEXT)
+            if village['alive']:
+                pop_text = self.font_small.render(f"Population: {village['population']:,}", True, C.COLOR_TEXT)
                 self.screen.blit(pop_text, (350, city_y))
         
+        if frame:
+            self._render_replay_timeline(frame)
+        
         hint_text = self.font_medium.render("Press ESC to return to map", True, (100, 100, 100))
         hint_rect = hint_text.get_rect(center=(self.width // 2, self.height - 40))
         self.screen.blit(hint_text, hint_rect)
     
+    def _render_replay_timeline(self, frame):
+        events_x = self.width - 520
+        events_y = 120 + 8 * 38 + 40
+        events_label = self.font_medium.render(f"Events in {frame.time_string()}:", True, C.COLOR_TEXT)
+        self.screen.blit(events_label, (events_x, events_y))
+        if not frame.events:
+            none_text = self.font_small.render("None", True, (150, 150, 150))
+            self.screen.blit(none_text, (events_x, events_y + 40))
+        for i, (event_type, names) in enumerate(frame.events):
+            event_text = self.font_small.render(f"• {C.EVENT_TYPES[event_type]['name']}: {', '.join(names)}", True, C.COLOR_TEXT)
+            self.screen.blit(event_text, (events_x, events_y + 40 + i * 28))
+        carts_text = self.font_small.render(f"Carts dispatched: {len(frame.carts)}", True, C.COLOR_TEXT)
+        self.screen.blit(carts_text, (events_x, events_y + 40 + max(1, len(frame.events)) * 28 + 10))
+        
+        rect = self._get_timeline_rect()
+        pygame.draw.rect(self.screen, (200, 200, 200), rect)
+        pygame.draw.rect(self.screen, C.COLOR_TEXT, rect, 1)
+        
+        span = max(1, self.replay.last_month - self.replay.first_month)
+        for month in range(self.replay.first_month, self.replay.last_month + 1):
+            if (month - 1) % 12 == 0:
+                tick_x = rect.x + (month - self.replay.first_month) / span * rect.width
+                pygame.draw.line(self.screen, C.COLOR_TEXT, (tick_x, rect.bottom), (tick_x, rect.bottom + 6), 1)
+        
+        handle_x = rect.x + (frame.month - self.replay.first_month) / span * rect.width
+        pygame.draw.circle(self.screen, (100, 100, 200), (int(handle_x), rect.centery), 10)
+        
+        hint_text = self.font_tiny.render("Drag the timeline or use Left/Right (Shift: year), Home/End to scrub the run", True, (100, 100, 100))
+        self.screen.blit(hint_text, (events_x, events_y + 40 + max(1, len(frame.events)) * 28 + 45))
+    
+    def _render_summary_tabs(self):
+        tab_x = self.width // 2 - len(SUMMARY_TABS) * 95
+        for i, tab in enumerate(SUMMARY_TABS):
+            tab_rect = pygame.Rect(tab_x + i * 190, 68, 180, 30)
+            color = (150, 150, 200) if i == self.summary_tab else (210, 200, 180)
+            pygame.draw.rect(self.screen, color, tab_rect)
+            pygame.draw.rect(self.screen, C.COLOR_TEXT, tab_rect, 1)
+            tab_text = self.font_small.render(f"{i + 1}. {tab}", True, C.COLOR_TEXT)
+            self.screen.blit(tab_text, tab_text.get_rect(center=tab_rect.center))
+    
+    def _render_flow_report(self):
+        analytics = self.analytics
+        resources = [self.flow_resource] if self.flow_resource else C.RESOURCES
+        label = self.flow_resource.capitalize() if self.flow_resource else "All resources"
+        
+        header = self.font_medium.render(f"Resource Flow: {label} (R to change)", True, C.COLOR_TEXT)
+        self.screen.blit(header, (80, 120))
+        
+        n = len(analytics.names)
+        matrix = [[sum(analytics.flows[res][i][j] for res in resources) for j in range(n)] for i in range(n)]
+        peak = max(max(row) for row in matrix) or 1
+        
+        cell = 40
+        grid_x = 300
+        grid_y = 190
+        for j in range(n):
+            col_text = self.font_tiny.render(str(j + 1), True, C.COLOR_TEXT)
+            self.screen.blit(col_text, (grid_x + j * cell + cell // 2 - 4, grid_y - 18))
+        for i, name in enumerate(analytics.names):
+            row_text = self.font_tiny.render(f"{i + 1}. {name}", True, C.COLOR_TEXT)
+            self.screen.blit(row_text, (80, grid_y + i * cell + cell // 2 - 6))
+            for j in range(n):
+                shade = int(255 * (1 - matrix[i][j] / peak))
+                cell_rect = pygame.Rect(grid_x + j * cell, grid_y + i * cell, cell - 2, cell - 2)
+                pygame.draw.rect(self.screen, (shade, shade, 255), cell_rect)
+        
+        axis_text = self.font_tiny.render("Rows send to columns; darker is more delivered", True, (100, 100, 100))
+        self.screen.blit(axis_text, (grid_x, grid_y + n * cell + 8))
+        
+        list_x = grid_x + n * cell + 60
+        top_label = self.font_medium.render("Top Routes", True, C.COLOR_TEXT)
+        self.screen.blit(top_label, (list_x, 160))
+        for i, (source, target, amount) in enumerate(analytics.top_routes(self.flow_resource)):
+            route_text = self.font_small.render(f"{source} -> {target}: {int(amount):,}", True, C.COLOR_TEXT)
+            self.screen.blit(route_text, (list_x, 200 + i * 28))
+        
+        sent = sum(analytics.sent[res] for res in resources)
+        delivered = sum(analytics.delivered[res] for res in resources)
+        totals_text = self.font_small.render(
+            f"Sent {int(sent):,}, delivered {int(delivered):,}, lost in transit {int(sent - delivered):,}", True, C.COLOR_TEXT)
+        self.screen.blit(totals_text, (list_x, 200 + 10 * 28 + 20))
+    
+    def _render_population_report(self):
+        analytics = self.analytics
+        self._render_mini_chart(80, 120, self.width - 160, 280, analytics.population_trend,
+                                "Kingdom Population", (100, 100, 200))
+        
+        columns = [80, 330, 460, 600, 760]
+        headers = ["City", "Deaths", "Destroyed", "Event months", "Events suffered"]
+        table_y = 430
+        for x, header in zip(columns, headers):
+            header_text = self.font_small.render(header, True, C.COLOR_TEXT)
+            self.screen.blit(header_text, (x, table_y))
+        
+        for i, name in enumerate(analytics.names):
+            row_y = table_y + 32 + i * 26
+            exposure = analytics.event_exposure[i]
+            suffered = ', '.join(f"{C.EVENT_TYPES[e]['name']} x{count}" for e, count in exposure.items() if count)
+            cells = [name, f"{analytics.deaths[i]:,}", analytics.destroyed_at[i] or "-",
+                     str(analytics.event_months[i]), suffered or "-"]
+            for x, value in zip(columns, cells):
+                cell_text = self.font_tiny.render(value, True, C.COLOR_TEXT)
+                self.screen.blit(cell_text, (x, row_y))
+    
+    def _render_decisions_report(self):
+        analytics = self.analytics
+        header = self.font_medium.render("Buildings and Their Impact", True, C.COLOR_TEXT)
+        self.screen.blit(header, (80, 120))
+        
+        if not analytics.builds:
+            none_text = self.font_small.render("No buildings were constructed this run", True, (150, 150, 150))
+            self.screen.blit(none_text, (80, 170))
+            return
+        
+        columns = [80, 330, 560, 720, 880, 1120]
+        headers = ["City", "Building", "Built", "Population", "Pop. after 12 mo", "Score after 12 mo"]
+        for x, title in zip(columns, headers):
+            header_text = self.font_small.render(title, True, C.COLOR_TEXT)
+            self.screen.blit(header_text, (x, 165))
+        
+        for i, build in enumerate(analytics.builds[:24]):
+            row_y = 200 + i * 26
+            pop_change = build['population_change']
+            score_change = build['score_change']
+            cells = [
+                analytics.names[build['city']],
+                C.BUILDINGS[build['building']]['name'],
+                build['time'],
+                f"{build['population']:,}",
+                "pending" if pop_change is None else f"{pop_change:+,}",
+                "pending" if score_change is None else f"{score_change:+}",
+            ]
+            for x, value in zip(columns, cells):
+                cell_text = self.font_tiny.render(value, True, C.COLOR_TEXT)
+                self.screen.blit(cell_text, (x, row_y))
+    
     def _render_completion_message(self):
         overlay = pygame.Surface((self.width, 180))
         overlay.set_alpha(220)
@@ -1,4 +1,5 @@
 import constants as C
+import scenario as S
 
 class Village:
     def __init__(self, name, produces, position, is_capital=False):
@@ -6,6 +7,8 @@ class Village:
         self.produces = produces
         self.position = position
         self.is_capital = is_capital
+        self.produce_id = S.TABLES.resource_ids[produces] if produces else None
+        self.produce_bit = 1 << self.produce_id if produces else 0
         
         self.population = C.CAPITAL_INITIAL_POPULATION if is_capital else C.INITIAL_POPULATION
         self.growth_rate = 0.0
@@ -14,56 +17,72 @@ class Village:
         self.resources = {res: initial for res in C.RESOURCES}
         
         self.buildings = []
+        self.building_mask = 0
         
         self.active_events = []
+        self.event_mask = 0
         
         self.population_history = []
         self.growth_history = []
-        self.event_log = []
+        # Set by the engine; the village's log lines are records in the shared store
+        self.event_store = None
+        self.index = None
         
         self.connected_routes = []
         
         self.is_alive = True
+        
+        # Bumped by every change to stock, population, events or buildings; code that
+        # changes them from outside calls mark_changed(). Derived values are cached against it.
+        self.version = 0
+        self._thresholds = None
+        self._thresholds_version = -1
+        self._production = None
+        self._production_version = -1
+    
+    def mark_changed(self):
+        self.version += 1
+    
+    @property
+    def event_log(self):
+        """Disasters and constructions here, oldest first, as log lines"""
+        if self.event_store is None:
+            return ()
+        return self.event_store.log(self.index)
     
     def calculate_thresholds(self):
-        survival = C.MINIMUM_SURVIVAL_BASE + (self.population * C.MINIMUM_SURVIVAL_PER_CAPITA)
-        growth = C.GROWTH_THRESHOLD_BASE + (self.population * C.GROWTH_THRESHOLD_PER_CAPITA)
-        return survival, growth
+        if self._thresholds_version != self.version:
+            survival = C.MINIMUM_SURVIVAL_BASE + (self.population * C.MINIMUM_SURVIVAL_PER_CAPITA)
+            growth = C.GROWTH_THRESHOLD_BASE + (self.population * C.GROWTH_THRESHOLD_PER_CAPITA)
+            self._thresholds = (survival, growth)
+            self._thresholds_version = self.version
+        return self._thresholds
     
     def calculate_production(self):
-        production = {}
+        """This month's production by resource; the dict is cached and shared, so don't modify it"""
+        if self._production_version == self.version:
+            return self._production
         
-        has_drought = any(e[0] == 'drought' for e in self.active_events)
-        has_strike = any(e[0] == 'strike' for e in self.active_events)
-        
-        production_bonus = 1.0
-        if 'camp' in self.buildings:
-            production_bonus = 1.05
-        
-        gold_bonus = 1.0
-        if 'hotel' in self.buildings:
-            gold_bonus = 1.05
+        production = {}
+        tables = S.TABLES
         
         if self.produces and not self.is_capital:
             base = C.BASE_PRODUCTION
             per_capita = self.population * C.PRODUCTION_PER_CAPITA
-            amount = (base + per_capita) * production_bonus
+            amount = (base + per_capita) * tables.production_multiplier[self.building_mask]
             
-            if has_drought and self.produces in ['livestock', 'grain']:
-                if self.produces == 'grain' and 'granary' in self.buildings:
-                    amount *= 0.5
-                else:
-                    amount = 0
-            
-            if has_strike and self.produces in ['wood', 'iron']:
-                amount = 0
+            # Blocked by an active event, unless a building keeps part of it going
+            if tables.blocked_resources[self.event_mask] & self.produce_bit:
+                amount *= tables.protection[self.building_mask][self.produce_id]
             
             production[self.produces] = amount
         
         gold_base = C.GOLD_BASE_PRODUCTION
         gold_per_capita = self.population * C.GOLD_PER_CAPITA
-        production['gold'] = (gold_base + gold_per_capita) * gold_bonus
+        production['gold'] = (gold_base + gold_per_capita) * tables.gold_multiplier[self.building_mask]
         
+        self._production = production
+        self._production_version = self.version
         return production
     
     def calculate_consumption(self):
@@ -117,33 +136,66 @@ class Village:
             self.population = max(100, int(new_population))
         
         self.active_events = [(evt, dur - 1) for evt, dur in self.active_events if dur > 1]
+        self.refresh_event_mask()
         
-        for event_type, _ in self.active_events:
-            if event_type == 'plague':
-                death_rate = 0.10
-                if 'wall' in self.buildings:
-                    death_rate *= 0.70
-                self.population = int(self.population * (1 - death_rate))
+        tables = S.TABLES
+        if self.event_mask & tables.lethal_mask:
+            death_rates = tables.death_rate[self.building_mask]
+            for event_type, _ in self.active_events:
+                death_rate = death_rates[tables.event_ids[event_type]]
+                if death_rate:
+                    self.population = int(self.population * (1 - death_rate))
         
         self.population_history.append(self.population)
         self.growth_history.append(self.growth_rate)
+        self.version += 1
     
     def add_event(self, event_type):
         duration = C.EVENT_TYPES[event_type]['duration']
         self.active_events.append((event_type, duration))
+        self.event_mask |= S.TABLES.event_bits[event_type]
         
-        event_name = C.EVENT_TYPES[event_type]['name']
-        self.event_log.append(event_name)
-        
-        if event_type == 'pirates':
+        keep = S.TABLES.keep_fraction[S.TABLES.event_ids[event_type]]
+        if keep != 1.0:
             for resource in C.RESOURCES:
-                self.resources[resource] *= 0.5
+                self.resources[resource] *= keep
+        self.version += 1
+    
+    def refresh_event_mask(self):
+        """Recompute event_mask after active_events is replaced"""
+        bits = S.TABLES.event_bits
+        mask = 0
+        for event_type, _ in self.active_events:
+            mask |= bits[event_type]
+        self.event_mask = mask
+        self.version += 1
+    
+    def refresh_building_mask(self):
+        """Recompute building_mask after buildings is replaced"""
+        bits = S.TABLES.building_bits
+        mask = 0
+        for building_type in self.buildings:
+            mask |= bits[building_type]
+        self.building_mask = mask
+        self.version += 1
+    
+    def fork(self):
+        """Copy of the live state for what-if rollouts; the copy starts with empty histories"""
+        clone = Village.__new__(Village)
+        clone.__dict__.update(self.__dict__)
+        clone.resources = dict(self.resources)
+        clone.buildings = list(self.buildings)
+        clone.active_events = list(self.active_events)
+        clone.population_history = []
+        clone.growth_history = []
+        clone.event_store = None
+        return clone
     
     def has_event_type(self, event_type):
-        return any(e[0] == event_type for e in self.active_events)
+        return bool(self.event_mask & S.TABLES.event_bits.get(event_type, 0))
     
     def can_afford_building(self, building_type):
-        if building_type in self.buildings:
+        if self.building_mask & S.TABLES.building_bits[building_type]:
             return False
         
         costs = C.BUILDINGS[building_type]['cost']
@@ -161,5 +213,8 @@ class Village:
             self.resources[resource] -= amount
         
         self.buildings.append(building_type)
-        self.event_log.append(f"Built {C.BUILDINGS[building_type]['name']}")
+        self.building_mask |= S.TABLES.building_bits[building_type]
+        if self.event_store is not None:
+            self.event_store.add_build(building_type, self.index)
+        self.version += 1
         return True
\ No newline at end of file